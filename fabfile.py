@@ -97,6 +97,7 @@ def configure_sever():
     local('heroku pg:promote DATABASE_URL --remote {}'.format(env.environment))
     local('heroku addons:create redistogo:nano --remote {}'.format(env.environment))
     local('heroku addons:create newrelic:wayne --remote {}'.format(env.environment))
+    local('heroku addons:create scheduler:standard --remote {}'.format(env.environment))
     local('heroku config:set NEW_RELIC_APP_NAME="{}" --remote {}'.format(env.project_name, env.environment))
     local('heroku config:set DJANGO_CONFIGURATION=Production --remote {}'.format(env.environment))
     local('heroku config:set DJANGO_SECRET_KEY="{}" --remote {}'.format(create_secret_key(), env.environment))
@@ -0,0 +1,106 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from config.cache import TwoTierCache
+from config.db.routers import use_primary
+
+from .signed import get_token_state, read_token
+
+token_cache = TwoTierCache(
+    prefix='auth-token',
+    timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+    local_size=settings.AUTH_TOKEN_CACHE_LOCAL_SIZE,
+    local_timeout=settings.AUTH_TOKEN_CACHE_LOCAL_TIMEOUT,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that keeps token -> user in the cache.
+
+    Only a cache miss reaches the database; the entries are dropped by the
+    signal receivers in ``authentication.models`` whenever a token or its
+    user changes.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            try:
+                user, token = super(CachedTokenAuthentication, self).authenticate_credentials(key)
+            except exceptions.AuthenticationFailed:
+                if not settings.DATABASE_REPLICAS:
+                    raise
+                # a token issued moments ago may not have replicated yet
+                with use_primary():
+                    user, token = super(CachedTokenAuthentication, self).authenticate_credentials(key)
+            token_cache.set(key, token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+def get_user(user_id):
+    try:
+        return get_user_model().objects.get(pk=user_id)
+    except get_user_model().DoesNotExist:
+        if not settings.DATABASE_REPLICAS:
+            raise
+        # a user created moments ago may not have replicated yet
+        with use_primary():
+            return get_user_model().objects.get(pk=user_id)
+
+
+class SignedTokenUser(SimpleLazyObject):
+    """
+    The user of a signed token, read from the database the first time
+    anything but ``pk`` or ``is_authenticated`` is used.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.__dict__['pk'] = uuid.UUID(user_id)
+        super(SignedTokenUser, self).__init__(lambda: get_user(user_id))
+
+    def __bool__(self):
+        return True
+    __nonzero__ = __bool__
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """
+    Authentication with the signed tokens of ``authentication.signed``, sent
+    as ``Authorization: Bearer <token>``.
+
+    A valid signature only costs CPU; the key version and ``is_active`` come
+    from the cache and are read from the primary on a miss, so a revocation
+    is seen at once. The user row itself is only read when a view uses it.
+    """
+    keyword = 'Bearer'
+
+    def authenticate_credentials(self, key):
+        try:
+            user_id, version = read_token(key)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except (signing.BadSignature, ValueError):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        state = get_token_state(user_id)
+        if state is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        key_version, is_active = state
+        if not is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        if key_version != version:
+            raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+        return (SignedTokenUser(user_id), key)
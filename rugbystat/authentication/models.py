@@ -1,10 +1,36 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from .backends import token_cache
+from .signed import invalidate_token_state
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+    else:
+        invalidate_user_tokens(instance)
+        invalidate_token_state(instance.pk.hex)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_signed_user(sender, instance=None, **kwargs):
+    invalidate_token_state(instance.pk.hex)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance=None, **kwargs):
+    token_cache.delete(instance.key)
+
+
+def invalidate_user_tokens(user):
+    """
+    Drops cached tokens of a user so the next request sees fresh user data.
+    """
+    keys = Token.objects.filter(user_id=user.pk).values_list('key', flat=True)
+    for key in keys:
+        token_cache.delete(key)
@@ -0,0 +1,92 @@
+"""
+Signed, expiring API tokens that need no database row.
+
+A token is ``<user id>:<key version>:<issue time>:<signature>``, signed with
+``SECRET_KEY`` by ``django.core.signing.TimestampSigner``. Checking the
+signature and age needs no I/O; the user's key version and ``is_active``
+come from the shared cache, a miss reads them from the primary. Bumping
+``User.key_version`` revokes every signed token issued to that user before.
+
+Only those two values are cached, and in the shared cache alone, so a
+revocation or deactivation is seen by every process at once. Misses store
+them with ``add``, which never overwrites; ``revoke_tokens`` increments the
+cached version with ``incr`` and every change deletes the entries again
+once its transaction has committed, so a miss that read the old row cannot
+leave it cached.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from config.db.routers import use_primary
+
+signer = signing.TimestampSigner(salt='authentication.signed')
+
+
+def issue_token(user):
+    return signer.sign('{}:{}'.format(user.pk.hex, user.key_version))
+
+
+def read_token(token):
+    """
+    Returns the user id and key version of a token.
+
+    Raises ``signing.SignatureExpired`` for tokens older than
+    ``SIGNED_TOKEN_MAX_AGE`` seconds and ``signing.BadSignature`` for
+    anything that was not issued by ``issue_token``.
+    """
+    value = signer.unsign(token, max_age=settings.SIGNED_TOKEN_MAX_AGE)
+    user_id, version = value.split(':')
+    return user_id, int(version)
+
+
+def state_keys(user_id):
+    return 'auth-key-version:{}'.format(user_id), 'auth-user-active:{}'.format(user_id)
+
+
+def get_token_state(user_id):
+    """
+    Returns ``(key_version, is_active)`` of the user with the hex id
+    ``user_id``, or ``None`` if there is no such user.
+    """
+    version_key, active_key = state_keys(user_id)
+    cached = cache.get_many([version_key, active_key])
+    if len(cached) == 2:
+        return cached[version_key], cached[active_key]
+
+    with use_primary():
+        state = get_user_model().objects.filter(pk=user_id).values_list('key_version', 'is_active').first()
+    if state is None:
+        return None
+    cache.add(version_key, state[0], settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    cache.add(active_key, state[1], settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    # a cached version was incremented by revoke_tokens, keep it over the row
+    return cached.get(version_key, state[0]), cached.get(active_key, state[1])
+
+
+def invalidate_token_state(user_id):
+    """
+    Drops the cached key version and ``is_active`` of a user, now and when
+    the current transaction commits.
+    """
+    keys = state_keys(user_id)
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def revoke_tokens(user):
+    """
+    Invalidates every signed token issued to ``user`` so far.
+    """
+    get_user_model().objects.filter(pk=user.pk).update(key_version=F('key_version') + 1)
+    version_key = state_keys(user.pk.hex)[0]
+    try:
+        # atomic, unlike reading the new version back and setting it
+        cache.incr(version_key)
+    except ValueError:
+        # not cached
+        pass
+    transaction.on_commit(lambda: cache.delete(version_key))
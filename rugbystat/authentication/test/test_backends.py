@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import TestCase
+from nose.tools import eq_
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from users.test.factories import UserFactory
+
+from ..backends import CachedTokenAuthentication, token_cache
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear_local()
+        self.user = UserFactory()
+        self.key = self.user.auth_token.key
+        self.backend = CachedTokenAuthentication()
+
+    def test_cached_token_skips_database(self):
+        self.backend.authenticate_credentials(self.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.backend.authenticate_credentials(self.key)
+        eq_(user, self.user)
+        eq_(token.key, self.key)
+
+    def test_shared_cache_is_used_when_local_tier_is_empty(self):
+        self.backend.authenticate_credentials(self.key)
+        token_cache.clear_local()
+
+        with self.assertNumQueries(0):
+            self.backend.authenticate_credentials(self.key)
+
+    def test_deleted_token_is_invalidated(self):
+        self.backend.authenticate_credentials(self.key)
+        Token.objects.filter(key=self.key).delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate_credentials(self.key)
+
+    def test_user_changes_are_picked_up(self):
+        self.backend.authenticate_credentials(self.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate_credentials(self.key)
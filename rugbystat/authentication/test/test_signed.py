@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mock import patch
+from nose.tools import eq_, ok_
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APITestCase
+from users.test.factories import UserFactory
+
+from ..backends import SignedTokenAuthentication
+from ..signed import issue_token, revoke_tokens, state_keys
+
+
+class SignedTokenAuthenticationTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.token = issue_token(self.user)
+        self.backend = SignedTokenAuthentication()
+
+    def test_cached_user_skips_database(self):
+        self.backend.authenticate_credentials(self.token)
+
+        with self.assertNumQueries(0):
+            user, token = self.backend.authenticate_credentials(self.token)
+            eq_(user.pk, self.user.pk)
+            ok_(user and user.is_authenticated)
+        eq_(user, self.user)
+        eq_(token, self.token)
+
+    def test_only_version_and_active_are_cached(self):
+        self.backend.authenticate_credentials(self.token)
+
+        version_key, active_key = state_keys(self.user.pk.hex)
+        eq_(cache.get_many([version_key, active_key]), {version_key: self.user.key_version, active_key: True})
+
+    def test_miss_does_not_overwrite_a_newer_version(self):
+        version_key = state_keys(self.user.pk.hex)[0]
+        cache.set(version_key, self.user.key_version + 1)
+
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.backend.authenticate_credentials(self.token)
+        eq_(raised.exception.detail, 'Token has been revoked.')
+        eq_(cache.get(version_key), self.user.key_version + 1)
+
+    def test_tampered_token_is_rejected(self):
+        user_id, rest = self.token.split(':', 1)
+        other = UserFactory()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate_credentials('{}:{}'.format(other.pk.hex, rest))
+
+    def test_expired_token_is_rejected(self):
+        with patch('django.core.signing.time.time', return_value=0):
+            token = issue_token(self.user)
+
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.backend.authenticate_credentials(token)
+        eq_(raised.exception.detail, 'Token has expired.')
+
+    def test_revoked_token_is_rejected(self):
+        self.backend.authenticate_credentials(self.token)
+        revoke_tokens(self.user)
+
+        with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed) as raised:
+            self.backend.authenticate_credentials(self.token)
+        eq_(raised.exception.detail, 'Token has been revoked.')
+        self.user.refresh_from_db()
+        self.backend.authenticate_credentials(issue_token(self.user))
+
+    def test_user_changes_are_picked_up(self):
+        self.backend.authenticate_credentials(self.token)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate_credentials(self.token)
+
+
+@override_settings(THROTTLE_RATES={})
+class SignedTokenViewTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.user.set_password('Match-day-1961')
+        self.user.save()
+        self.url = reverse('api-signed-token-auth')
+
+    def test_issued_token_authenticates(self):
+        response = self.client.post(self.url, {'username': self.user.username, 'password': 'Match-day-1961'})
+        eq_(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(response.data['token']))
+        response = self.client.get(reverse('user-detail', kwargs={'pk': self.user.pk}))
+        eq_(response.status_code, status.HTTP_200_OK)
+
+    def test_wrong_password_is_rejected(self):
+        response = self.client.post(self.url, {'username': self.user.username, 'password': 'wrong'})
+        eq_(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_revokes_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(issue_token(self.user)))
+
+        eq_(self.client.delete(self.url).status_code, status.HTTP_204_NO_CONTENT)
+        eq_(self.client.delete(self.url).data['detail'], 'Token has been revoked.')
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from mock import Mock, patch
+from nose.tools import eq_, ok_
+from redis.exceptions import ConnectionError
+from rest_framework.test import APITestCase
+from users.test.factories import UserFactory
+
+from ..throttling import LocalSlidingWindow, RedisSlidingWindow, get_backend
+
+
+class LocalSlidingWindowTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = LocalSlidingWindow()
+
+    def test_allows_up_to_limit(self):
+        eq_(self.backend.hit('key', 2, 60), 0)
+        eq_(self.backend.hit('key', 2, 60), 0)
+        ok_(self.backend.hit('key', 2, 60) > 59)
+
+    def test_window_slides(self):
+        with patch('time.time', return_value=1000.0):
+            self.backend.hit('key', 1, 60)
+        with patch('time.time', return_value=1030.0):
+            eq_(self.backend.hit('key', 1, 60), 30)
+        with patch('time.time', return_value=1060.5):
+            eq_(self.backend.hit('key', 1, 60), 0)
+
+    def test_keys_are_independent(self):
+        self.backend.hit('a', 1, 60)
+        eq_(self.backend.hit('b', 1, 60), 0)
+
+
+class RedisSlidingWindowTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = RedisSlidingWindow()
+        self.backend._script = Mock()
+
+    def test_wait_is_returned_in_seconds(self):
+        self.backend._script.return_value = 1500
+        eq_(self.backend.hit('key', 1, 60), 1.5)
+        kwargs = self.backend._script.call_args[1]
+        eq_(kwargs['keys'], ['key'])
+        eq_(kwargs['args'][1:3], [60, 1])
+
+    def test_redis_outage_lets_requests_through(self):
+        self.backend._script.side_effect = ConnectionError
+        eq_(self.backend.hit('key', 1, 60), 0)
+
+
+@override_settings(THROTTLE_RATES={'signup': '2/hour', 'token-auth': '1/min', 'user-read': '1/min'})
+class ThrottledEndpointsTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        get_backend().clear()
+
+    def test_signup_is_throttled(self):
+        url = reverse('user-list')
+        for status in (400, 400, 429):
+            eq_(self.client.post(url, {}).status_code, status)
+
+    @override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, NUM_PROXIES=1))
+    def test_forwarded_for_cannot_be_spoofed(self):
+        url = reverse('user-list')
+        for number, status in enumerate((400, 400, 429)):
+            # the router appends the address it saw to what the client sent
+            forwarded_for = '198.51.100.{}, 203.0.113.7'.format(number)
+            eq_(self.client.post(url, {}, HTTP_X_FORWARDED_FOR=forwarded_for).status_code, status)
+
+    def test_token_auth_is_throttled(self):
+        url = reverse('api-token-auth')
+        eq_(self.client.post(url, {}).status_code, 400)
+        response = self.client.post(url, {})
+        eq_(response.status_code, 429)
+        ok_(int(response['Retry-After']) <= 60)
+
+    def test_reads_are_throttled_per_user(self):
+        user = UserFactory()
+        url = reverse('user-detail', kwargs={'pk': user.pk})
+        self.client.force_authenticate(user)
+        eq_(self.client.get(url).status_code, 200)
+        eq_(self.client.get(url).status_code, 429)
+
+        self.client.force_authenticate(UserFactory())
+        eq_(self.client.get(url).status_code, 200)
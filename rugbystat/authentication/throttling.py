@@ -0,0 +1,157 @@
+"""
+Sliding-window request throttles.
+
+Each scope allows ``n`` requests in any window of the configured length,
+not per fixed clock period, so a client can't burst twice the limit around
+a boundary. Windows are kept by the backend named in ``THROTTLE_BACKEND``:
+a sorted set per client in Redis, updated by one Lua script call per
+request, or an in-process dict for ``Local``. Limits come from
+``THROTTLE_RATES``, looked up per request; a scope without a rate is not
+throttled.
+"""
+from __future__ import absolute_import, division
+
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+SLIDING_WINDOW = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.ceil((tonumber(oldest[2]) + window - now) * 1000)
+"""
+
+
+class RedisSlidingWindow(object):
+    """
+    Windows in the Redis server behind the ``THROTTLE_CACHE`` cache, sharing
+    its connection pool.
+    """
+
+    def __init__(self):
+        self._script = None
+
+    @property
+    def script(self):
+        if self._script is None:
+            client = caches[settings.THROTTLE_CACHE].get_master_client()
+            self._script = client.register_script(SLIDING_WINDOW)
+        return self._script
+
+    def hit(self, key, limit, window):
+        """
+        Records a request and returns the seconds to wait before the next
+        one is allowed, 0 if this one is.
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            wait = self.script(keys=[key], args=[time.time(), window, limit, uuid.uuid4().hex])
+        except RedisError:
+            # an outage of the throttle store shouldn't take the API down
+            logger.warning('Throttle store unavailable, letting the request through', exc_info=True)
+            return 0
+        return int(wait) / 1000
+
+
+class LocalSlidingWindow(object):
+    """
+    Windows in the memory of the current process, for development.
+    """
+
+    def __init__(self):
+        self.hits = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        with self._lock:
+            hits = self.hits[key]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                hits.append(now)
+                return 0
+            return hits[0] + window - now
+
+    def clear(self):
+        with self._lock:
+            self.hits.clear()
+
+
+_backends = {}
+
+
+def get_backend():
+    path = settings.THROTTLE_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # rates are read in allow_request, so they follow settings changes
+        pass
+
+    def get_rate(self):
+        return settings.THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        if rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        limit, window = self.parse_rate(rate)
+        self.wait_time = get_backend().hit(key, limit, window)
+        return self.wait_time == 0
+
+    def wait(self):
+        return math.ceil(self.wait_time)
+
+
+class SignupRateThrottle(SlidingWindowRateThrottle):
+    scope = 'signup'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class TokenAuthRateThrottle(SignupRateThrottle):
+    scope = 'token-auth'
+
+
+class UserReadRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limits reads by authenticated users; other requests are left to the
+    scopes above.
+    """
+    scope = 'user-read'
+
+    def get_cache_key(self, request, view):
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
@@ -1,8 +1,9 @@
 from django.conf.urls import include, url
 
-from rest_framework.authtoken import views
+from . import views
 
 urlpatterns = [
-    url(r'^api-token-auth/', views.obtain_auth_token),
+    url(r'^api-token-auth/', views.obtain_auth_token, name='api-token-auth'),
+    url(r'^api-signed-token-auth/', views.obtain_signed_token, name='api-signed-token-auth'),
     url(r'^api-auth/', include('rest_framework.urls', namespace='rest_framework')),
 ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .signed import issue_token, revoke_tokens
+from .throttling import TokenAuthRateThrottle
+
+
+class ThrottledObtainAuthToken(ObtainAuthToken):
+    throttle_classes = (TokenAuthRateThrottle,)
+
+
+class ObtainSignedToken(ThrottledObtainAuthToken):
+    """
+    POST issues a signed token for a username and password, DELETE revokes
+    all signed tokens of the authenticated user.
+    """
+
+    def get_permissions(self):
+        if self.request.method == 'DELETE':
+            return [IsAuthenticated()]
+        return super(ObtainSignedToken, self).get_permissions()
+
+    def get_throttles(self):
+        if self.request.method == 'DELETE':
+            return []
+        return super(ObtainSignedToken, self).get_throttles()
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        return Response({'token': issue_token(user), 'expires_in': settings.SIGNED_TOKEN_MAX_AGE})
+
+    def delete(self, request, *args, **kwargs):
+        revoke_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+obtain_auth_token = ThrottledObtainAuthToken.as_view()
+obtain_signed_token = ObtainSignedToken.as_view()
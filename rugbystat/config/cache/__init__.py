@@ -0,0 +1,167 @@
+"""
+Caching in front of the configured cache backends.
+
+``TwoTierCache`` keeps a short-lived in-process LRU (``LocalLRUCache``) in
+front of a shared Django cache. ``config.cache.backends`` has the Redis
+backend production uses as that shared cache.
+"""
+from __future__ import absolute_import
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from config.instrumentation import record_cache
+
+
+class LocalLRUCache(object):
+    """
+    Small thread-safe in-process LRU cache with a per-entry timeout.
+    """
+
+    def __init__(self, max_size=1024, timeout=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires < time.time():
+                return default
+            # re-insert to mark the key as most recently used
+            self._data[key] = (expires, value)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.time() + self.timeout, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache(object):
+    """
+    Keeps values in a local LRU in front of a shared Django cache backend.
+
+    Local entries expire after ``local_timeout`` seconds so that an
+    invalidation made by another process is picked up within that window.
+    """
+
+    def __init__(self, prefix, timeout=3600, local_size=1024, local_timeout=30,
+                 alias='default'):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.alias = alias
+        self.local = LocalLRUCache(max_size=local_size, timeout=local_timeout)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        return '{}:{}'.format(self.prefix, key)
+
+    def get(self, key):
+        cache_key = self.make_key(key)
+        value = self.local.get(cache_key)
+        if value is None:
+            value = self.shared.get(cache_key)
+            if value is not None:
+                self.local.set(cache_key, value)
+        record_cache(hits=int(value is not None), misses=int(value is None))
+        return value
+
+    def set(self, key, value):
+        cache_key = self.make_key(key)
+        self.local.set(cache_key, value)
+        self.shared.set(cache_key, value, self.timeout)
+
+    def add(self, key, value):
+        """
+        Stores ``value`` unless the shared cache already has ``key``, and
+        returns what the shared cache holds afterwards.
+        """
+        cache_key = self.make_key(key)
+        if not self.shared.add(cache_key, value, self.timeout):
+            # gone again in between at worst, then ours is as good as any
+            value = self.shared.get(cache_key, value)
+        self.local.set(cache_key, value)
+        return value
+
+    def incr(self, key):
+        """
+        Increments ``key`` in the shared cache, returns the new value or
+        ``None`` if the key isn't there.
+        """
+        cache_key = self.make_key(key)
+        self.local.delete(cache_key)
+        try:
+            return self.shared.incr(cache_key)
+        except ValueError:
+            return None
+
+    def delete(self, key):
+        cache_key = self.make_key(key)
+        self.local.delete(cache_key)
+        self.shared.delete(cache_key)
+
+    def delete_many(self, keys):
+        cache_keys = [self.make_key(key) for key in keys]
+        for cache_key in cache_keys:
+            self.local.delete(cache_key)
+        self.shared.delete_many(cache_keys)
+
+    def get_or_compute(self, key, compute, lock_timeout=10, wait=0.5, poll=0.05):
+        """
+        Returns the cached value, or stores and returns what ``compute()``
+        returns (``None`` is not stored).
+
+        On a miss only the caller that takes a lock in the shared cache
+        computes; the others poll for its result for up to ``wait`` seconds
+        before computing themselves, so a popular key expiring doesn't send
+        every client to the database at once.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lock_key = self.make_key('lock:{}'.format(key))
+        if self.shared.add(lock_key, 1, lock_timeout):
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value)
+            finally:
+                self.shared.delete(lock_key)
+            return value
+
+        deadline = time.time() + wait
+        while time.time() < deadline:
+            time.sleep(poll)
+            value = self.shared.get(self.make_key(key))
+            if value is not None:
+                self.local.set(self.make_key(key), value)
+                return value
+        return compute()
+
+    def clear_local(self):
+        self.local.clear()
@@ -0,0 +1,212 @@
+"""
+Redis cache backend tuned for a small shared Redis server.
+
+``RedisCache`` extends django-redis-cache's backend:
+
+- values of ``COMPRESS_MIN_LENGTH`` bytes or more are stored compressed
+  with zlib when that makes them smaller;
+- with ``MSGPACK`` on, values msgpack can encode exactly (dicts, lists,
+  strings, numbers) are stored in msgpack instead of pickle, anything else
+  still goes through pickle;
+- ``set`` and ``add`` are a single ``SET ... EX [NX]`` command and
+  ``set_many`` one pipeline without ``MULTI``;
+- hits, misses, writes and stored bytes are counted per key prefix (the
+  key up to its first ``:``, or one of ``STATS_PREFIXES``) in the
+  ``STATS_KEY`` hash. Writes are counted in the pipeline that stores them,
+  ``get`` and ``get_many`` run ``MGET`` in a Lua script that counts as
+  well, so counting adds no round-trip. ``manage.py cache_stats`` prints
+  the numbers.
+
+Every stored value starts with a byte naming its format, values written
+before this backend (plain pickle) and integers (kept as is for ``INCR``)
+are still read.
+"""
+from __future__ import absolute_import, division
+
+import zlib
+from collections import defaultdict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import six
+from django.utils.six.moves import cPickle as pickle
+from redis_cache import RedisCache as BaseRedisCache
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PICKLE = b'p'
+MSGPACK = b'm'
+ZLIB = b'z'
+STATS_FIELDS = ('hits', 'misses', 'sets', 'bytes', 'raw_bytes')
+# keys per script call, Lua can't unpack many more into MGET arguments
+SCRIPT_KEYS = 1000
+
+# MGET that also counts the hits and misses of every key group, ARGV holds
+# the stats hash and the group of each key
+GET_COUNTED = """
+local values = redis.call('MGET', unpack(KEYS))
+local counts = {}
+for i = 1, #KEYS do
+    local field = ARGV[i + 1] .. (values[i] and ':hits' or ':misses')
+    counts[field] = (counts[field] or 0) + 1
+end
+for field, amount in pairs(counts) do
+    redis.call('HINCRBY', ARGV[1], field, amount)
+end
+return values
+"""
+
+
+class RedisCache(BaseRedisCache):
+
+    def __init__(self, server, params):
+        super(RedisCache, self).__init__(server, params)
+        self.compress_min_length = int(self.options.get('COMPRESS_MIN_LENGTH', 1024))
+        self.compress_level = int(self.options.get('COMPRESS_LEVEL', 6))
+        self.use_msgpack = bool(self.options.get('MSGPACK', False))
+        if self.use_msgpack and msgpack is None:
+            raise ImproperlyConfigured('The MSGPACK cache option requires the msgpack package')
+        self.stats_key = self.options.get('STATS_KEY', 'cache-stats')
+        self.stats_prefixes = tuple(self.options.get('STATS_PREFIXES', ()))
+        self._get_counted = None
+
+    # values
+
+    def encode(self, value):
+        """
+        Returns the stored form of ``value`` and its size before compression.
+        """
+        if isinstance(value, six.integer_types) and not isinstance(value, bool):
+            data = six.text_type(value).encode('ascii')
+            return data, len(data)
+
+        data = None
+        if self.use_msgpack:
+            try:
+                data = MSGPACK + msgpack.packb(value, use_bin_type=True, strict_types=True)
+            except (TypeError, ValueError, OverflowError):
+                pass
+        if data is None:
+            data = PICKLE + pickle.dumps(value, self.pickle_version)
+        raw_length = len(data)
+        if raw_length >= self.compress_min_length:
+            compressed = ZLIB + zlib.compress(data, self.compress_level)
+            if len(compressed) < raw_length:
+                data = compressed
+        return data, raw_length
+
+    def prep_value(self, value):
+        return self.encode(value)[0]
+
+    def get_value(self, original):
+        try:
+            return int(original)
+        except (ValueError, TypeError):
+            pass
+        data = original
+        if data[:1] == ZLIB:
+            data = zlib.decompress(data[1:])
+        if data[:1] == MSGPACK:
+            return msgpack.unpackb(data[1:], raw=False)
+        if data[:1] == PICKLE:
+            return pickle.loads(data[1:])
+        # written by redis_cache.RedisCache
+        return pickle.loads(data)
+
+    # commands
+
+    def _set(self, client, key, value, timeout, _add_only=False):
+        if timeout is not None and timeout <= 0:
+            # expired at once, as in Django's backends; redis_cache would
+            # store a timeout of 0 forever
+            if not _add_only:
+                client.delete(key)
+            return False
+        # one command instead of SETNX and EXPIRE, which could also leave a
+        # key without expiry behind
+        return bool(client.set(key, value, ex=timeout or None, nx=_add_only))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store({key: value}, timeout, version, add=True)[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store({key: value}, timeout, version)[0]
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._store(data, timeout, version)
+        return []
+
+    def _store(self, data, timeout, version, add=False):
+        timeout = self.get_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            # expired at once, don't leave an older value behind either
+            if not add:
+                self.master_client.delete(*[self.make_key(key, version=version) for key in data])
+            return [False] * len(data)
+
+        pipeline = self.master_client.pipeline(transaction=False)
+        counts = defaultdict(int)
+        for key, value in data.items():
+            value, raw_length = self.encode(value)
+            pipeline.set(self.make_key(key, version=version), value, ex=timeout or None, nx=add)
+            group = self.key_group(key)
+            counts[group, 'sets'] += 1
+            counts[group, 'bytes'] += len(value)
+            counts[group, 'raw_bytes'] += raw_length
+        self.count(pipeline, counts)
+        return [bool(result) for result in pipeline.execute()[:len(data)]]
+
+    def get(self, key, default=None, version=None):
+        value = self.get_many([key], version=version).get(key)
+        return default if value is None else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        versioned_keys = self.make_keys(keys, version=version)
+        if self.stats_key:
+            values = []
+            for start in range(0, len(keys), SCRIPT_KEYS):
+                values.extend(self.get_counted(versioned_keys[start:start + SCRIPT_KEYS],
+                                               [self.key_group(key) for key in keys[start:start + SCRIPT_KEYS]]))
+        else:
+            values = self.master_client.mget(versioned_keys)
+        return dict((key, self.get_value(value)) for key, value in zip(keys, values) if value is not None)
+
+    def get_counted(self, keys, groups):
+        if self._get_counted is None:
+            self._get_counted = self.master_client.register_script(GET_COUNTED)
+        return self._get_counted(keys=keys, args=[self.stats_key] + groups)
+
+    # statistics
+
+    def key_group(self, key):
+        for prefix in self.stats_prefixes:
+            if key.startswith(prefix):
+                return prefix
+        return key.split(':', 1)[0] if ':' in key else 'other'
+
+    def count(self, pipeline, counts):
+        if self.stats_key:
+            for (group, name), amount in sorted(counts.items()):
+                if amount:
+                    pipeline.hincrby(self.stats_key, '{}:{}'.format(group, name), amount)
+
+    def get_stats(self):
+        """
+        Returns ``{prefix: {'hits': ..., 'misses': ..., 'sets': ...,
+        'bytes': ..., 'raw_bytes': ...}}`` since the last ``reset_stats``.
+        """
+        stats = defaultdict(lambda: dict.fromkeys(STATS_FIELDS, 0))
+        for field, amount in self.master_client.hgetall(self.stats_key).items():
+            group, name = field.decode('utf-8').rsplit(':', 1)
+            stats[group][name] = int(amount)
+        return dict(stats)
+
+    def reset_stats(self):
+        self.master_client.delete(self.stats_key)
@@ -3,6 +3,8 @@ from os.path import join
 
 from configurations import Configuration, values
 
+from .db import PooledDatabaseURLValue, add_replicas
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -25,12 +27,17 @@ class Common(Configuration):
 
         # Your apps
         'authentication',
+        'media',
+        'core',
+        'stats',
         'users'
 
     )
 
     # https://docs.djangoproject.com/en/1.10/topics/http/middleware/
     MIDDLEWARE = (
+        'config.instrumentation.PerformanceMiddleware',
+        'config.db.routers.ReplicaMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
         'django.middleware.common.CommonMiddleware',
         'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,6 +49,17 @@ class Common(Configuration):
 
     ROOT_URLCONF = 'urls'
 
+    # Most SQL queries a view may run, see config.instrumentation. Going
+    # over logs a warning, or fails the request if QUERY_BUDGET_STRICT is on.
+    QUERY_BUDGETS = {
+        'UserViewSet.create': 4,
+        'UserViewSet.list': 2,
+        'UserViewSet.retrieve': 3,
+        'UserViewSet.update': 5,
+        'UserViewSet.partial_update': 5,
+    }
+    QUERY_BUDGET_STRICT = values.BooleanValue(False)
+
     SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'Not a secret')
     WSGI_APPLICATION = 'wsgi.application'
 
@@ -56,7 +74,30 @@ class Common(Configuration):
     DB_USER = os.environ.get('POSTGRES_USER', 'postgres')
     DB_PASS = os.environ.get('POSTGRES_PASS', '1111')
     DB_URL = 'postgres://{}:{}@localhost/rugbystat'.format(DB_USER, DB_PASS)
-    DATABASES = values.DatabaseURLValue(DB_URL)
+    DATABASES = PooledDatabaseURLValue(DB_URL)
+
+    # Per-process pool behind the Postgres backend, see config.db. Requests
+    # wait up to DATABASE_POOL_TIMEOUT seconds for a free connection; idle
+    # ones are pinged before reuse after DATABASE_POOL_CHECK_INTERVAL.
+    DATABASE_POOL_MAX_SIZE = values.IntegerValue(20)
+    DATABASE_POOL_TIMEOUT = values.IntegerValue(10)
+    DATABASE_POOL_CHECK_INTERVAL = values.IntegerValue(30)
+
+    # Read replicas, a comma separated list of database URLs added to
+    # DATABASES as replica1, replica2, ... Reads of GET requests go there,
+    # see config.db.routers. A client that wrote reads from the primary for
+    # REPLICA_STICKY_SECONDS; replicas lagging more than REPLICA_MAX_LAG
+    # seconds (checked every REPLICA_LAG_CHECK_INTERVAL) are skipped.
+    DATABASE_REPLICA_URLS = values.ListValue([], environ_prefix=None)
+    DATABASE_ROUTERS = ['config.db.routers.ReplicaRouter']
+    REPLICA_STICKY_SECONDS = values.IntegerValue(10)
+    REPLICA_MAX_LAG = values.FloatValue(5.0)
+    REPLICA_LAG_CHECK_INTERVAL = values.IntegerValue(5)
+
+    # Sessions: read from the cache, written through to the database, and
+    # not rewritten when only the expiry moved by less than the grace period
+    SESSION_ENGINE = 'config.sessions'
+    SESSION_WRITE_GRACE = values.IntegerValue(60 * 60)
 
     # General
     APPEND_SLASH = values.BooleanValue(False)
@@ -109,12 +150,35 @@ class Common(Configuration):
         },
     ]
 
+    # Compiled by config.warmup when the web process starts
+    WARM_UP_TEMPLATES = (
+        'rest_framework/api.html',
+        'rest_framework/login.html',
+        'admin/login.html',
+    )
+
     # Set DEBUG to False as a default for safety
     # https://docs.djangoproject.com/en/dev/ref/settings/#debug
     DEBUG = values.BooleanValue(False)
     for config in TEMPLATES:
         config['OPTIONS']['debug'] = DEBUG
 
+    # New passwords are hashed with Argon2, older hashes are upgraded the
+    # next time their user logs in
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ]
+
+    # Hashing runs on a bounded thread pool, see users.hashing; requests
+    # beyond workers + max waiting, or queued for longer than the timeout
+    # (seconds), get a 429
+    USERS_HASHING_WORKERS = values.IntegerValue(2)
+    USERS_HASHING_MAX_WAITING = values.IntegerValue(16)
+    USERS_HASHING_QUEUE_TIMEOUT = values.FloatValue(2.0)
+
     # Password Validation
     # https://docs.djangoproject.com/en/1.10/topics/auth/passwords/#module-django.contrib.auth.password_validation
     AUTH_PASSWORD_VALIDATORS = [
@@ -131,6 +195,11 @@ class Common(Configuration):
 
     # Logging
     from .logging import LOGGING
+    # Identical errors logged within LOG_DIGEST_WINDOW seconds are mailed to
+    # ADMINS once, by a job on LOG_DIGEST_QUEUE
+    LOG_DIGEST_WINDOW = values.IntegerValue(60)
+    LOG_DIGEST_QUEUE = 'high'
+    LOG_DIGEST_CACHE = 'default'
 
     # Custom user app
     AUTH_USER_MODEL = 'users.User'
@@ -150,10 +219,46 @@ class Common(Configuration):
         ],
         'DEFAULT_AUTHENTICATION_CLASSES': (
             'rest_framework.authentication.SessionAuthentication',
-            'rest_framework.authentication.TokenAuthentication',
-        )
+            'authentication.backends.CachedTokenAuthentication',
+            'authentication.backends.SignedTokenAuthentication',
+        ),
+        'DEFAULT_THROTTLE_CLASSES': (
+            'authentication.throttling.UserReadRateThrottle',
+        ),
+        'EXCEPTION_HANDLER': 'users.exceptions.exception_handler',
+    }
+
+    # Sliding-window throttles, see authentication.throttling. Signup and
+    # token auth are limited per client address, reads per user.
+    THROTTLE_BACKEND = values.Value('authentication.throttling.RedisSlidingWindow')
+    THROTTLE_CACHE = 'default'
+    THROTTLE_RATES = {
+        'signup': '20/hour',
+        'token-auth': '30/min',
+        'user-read': '600/min',
     }
 
+    # Token authentication cache: token -> user is kept in the default cache
+    # with a short-lived in-process LRU in front of it
+    AUTH_TOKEN_CACHE_TIMEOUT = values.IntegerValue(60 * 60)
+    AUTH_TOKEN_CACHE_LOCAL_SIZE = values.IntegerValue(1024)
+    AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = values.IntegerValue(30)
+    # Signed tokens from api-signed-token-auth/ expire after this many seconds
+    SIGNED_TOKEN_MAX_AGE = values.IntegerValue(60 * 60 * 24)
+
+    # Serve user reads from values() rows through a precompiled serializer
+    # and a ujson renderer instead of the ModelSerializer/JSONRenderer path
+    USERS_FAST_RENDERING = values.BooleanValue(False)
+
+    # Rendered GET /users/<id>/ responses, kept in the default cache with an
+    # in-process copy that other processes drop after LOCAL_TIMEOUT seconds
+    USERS_RESPONSE_CACHE_TIMEOUT = values.IntegerValue(60 * 5)
+    USERS_RESPONSE_CACHE_LOCAL_SIZE = values.IntegerValue(1024)
+    USERS_RESPONSE_CACHE_LOCAL_TIMEOUT = values.IntegerValue(5)
+
+    # Bulk user import: rows per INSERT, passwords are hashed by users.hashing
+    USERS_BULK_CREATE_BATCH_SIZE = values.IntegerValue(500)
+
     # Versatile Image Field
     VERSATILEIMAGEFIELD_SETTINGS = {
         # The amount of time, in seconds, that references to created images
@@ -166,9 +271,49 @@ class Common(Configuration):
         'placeholder_directory_name': '__placeholder__',
         'create_images_on_demand': False
     }
+    VERSATILEIMAGEFIELD_RENDITION_KEY_SETS = {}
+
+    # Renditions generated ahead of time by the rq workers, as
+    # {'app_label.Model.field': '<key set in VERSATILEIMAGEFIELD_RENDITION_KEY_SETS>'}.
+    # Serialize these fields with media.serializers.IndexedImageFieldSerializer.
+    MEDIA_RENDITION_FIELDS = {}
+    MEDIA_RENDITION_QUEUE = 'bulk'
+
+    # Aggregate tables are updated by jobs on STATS_QUEUE when results are
+    # saved, rebuild_stats counts STATS_CHUNK_SIZE matches per process
+    STATS_QUEUE = 'default'
+    STATS_CHUNK_SIZE = values.IntegerValue(5000)
+    STATS_REBUILD_PROCESSES = values.IntegerValue(4)
+    # import_results writes STATS_IMPORT_BATCH_SIZE rows per transaction,
+    # with --enqueue the files go to storage under STATS_IMPORT_PREFIX and
+    # are imported by jobs on STATS_IMPORT_QUEUE
+    STATS_IMPORT_BATCH_SIZE = values.IntegerValue(50000)
+    STATS_IMPORT_PREFIX = 'imports'
+    STATS_IMPORT_QUEUE = 'bulk'
+    STATS_IMPORT_TIMEOUT = values.IntegerValue(60 * 60)
 
     # django-rq
     # Adds dashboard link for queues in /admin, This will override the default
     # admin template so it may interfere with other apps that modify the
     # default admin template. If you're using such an app, simply remove this.
     RQ_SHOW_ADMIN_LINK = True
+
+    # Modules imported by config.jobs.Worker before it forks work horses
+    RQ_PRELOAD = (
+        'PIL.Image',
+        'config.sessions',
+        'media.renditions',
+        'stats.aggregation',
+        'stats.importer',
+        'users.bulk',
+    )
+    # Failed jobs enqueued with retries wait RQ_RETRY_BACKOFF * 2 ** attempt
+    # seconds, idle workers requeue them every RQ_RETRY_POLL seconds
+    RQ_RETRY_BACKOFF = values.IntegerValue(10)
+    RQ_RETRY_POLL = values.IntegerValue(5)
+    RQ_GROUP_TTL = values.IntegerValue(60 * 60 * 24)
+
+    @classmethod
+    def setup(cls):
+        super(Common, cls).setup()
+        cls.DATABASE_REPLICAS = add_replicas(cls.DATABASES, cls.DATABASE_REPLICA_URLS)
@@ -0,0 +1,40 @@
+import dj_database_url
+from configurations import values
+
+POSTGRES_ENGINES = (
+    'django.db.backends.postgresql',
+    'django.db.backends.postgresql_psycopg2',
+)
+
+
+def use_pool(database):
+    if database.get('ENGINE') in POSTGRES_ENGINES:
+        database['ENGINE'] = 'config.db'
+    return database
+
+
+class PooledDatabaseURLValue(values.DatabaseURLValue):
+    """
+    ``DATABASE_URL`` value that serves Postgres through ``config.db``'s
+    pooled backend. Other engines are left alone.
+    """
+
+    def to_python(self, value):
+        databases = super(PooledDatabaseURLValue, self).to_python(value)
+        for database in databases.values():
+            use_pool(database)
+        return databases
+
+
+def add_replicas(databases, urls):
+    """
+    Adds a ``replicaN`` alias to ``databases`` for every URL and returns the
+    aliases. Tests run the replicas against the default database.
+    """
+    aliases = []
+    for number, url in enumerate(urls, 1):
+        alias = 'replica{}'.format(number)
+        databases[alias] = use_pool(dj_database_url.parse(url))
+        databases[alias]['TEST'] = {'MIRROR': 'default'}
+        aliases.append(alias)
+    return aliases
@@ -0,0 +1,84 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool.
+
+Django still opens and closes its connection around each request
+(``CONN_MAX_AGE = 0``), but closing at the end of a request returns the
+psycopg2 connection to the pool and opening takes one from it, so a request
+does not pay for a new Postgres backend process.
+
+There is a pool per database (alias, name, host, port and user), so
+switching ``settings_dict`` to a test database does not hand out
+connections to the old one. Connections closed outside a request, by
+management commands, rq jobs or test database setup, or opened with other
+settings than the current ones are really closed.
+"""
+from __future__ import absolute_import
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.postgresql import base
+
+from .pool import get_pool
+
+
+def pool_key(alias, settings_dict):
+    return (alias,) + tuple(settings_dict[name] for name in ('NAME', 'HOST', 'PORT', 'USER'))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # set between request_started and request_finished
+    in_request = False
+
+    def __init__(self, *args, **kwargs):
+        super(DatabaseWrapper, self).__init__(*args, **kwargs)
+        self.pool = self.pool_key = None
+
+    def get_pool(self, conn_params):
+        return get_pool(
+            pool_key(self.alias, self.settings_dict),
+            connect=lambda: base.Database.connect(**conn_params),
+            max_size=settings.DATABASE_POOL_MAX_SIZE,
+            timeout=settings.DATABASE_POOL_TIMEOUT,
+            check_interval=settings.DATABASE_POOL_CHECK_INTERVAL,
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        self.pool_key = pool_key(self.alias, self.settings_dict)
+        connection = self.pool.acquire()
+        # a reused connection may still be in autocommit mode, which would
+        # be read back below as its isolation level
+        connection.autocommit = False
+
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            pool, key = self.pool, self.pool_key
+            self.pool = self.pool_key = None
+            with self.wrap_database_errors:
+                if self.in_request and key == pool_key(self.alias, self.settings_dict):
+                    pool.release(self.connection)
+                else:
+                    pool.discard(self.connection)
+
+
+def set_in_request(in_request):
+    for connection in connections.all():
+        if isinstance(connection, DatabaseWrapper):
+            connection.in_request = in_request
+
+
+# connected after django.db's close_old_connections, so the connections it
+# closes at the end of a request still go back to the pool
+request_started.connect(lambda **kwargs: set_in_request(True), weak=False, dispatch_uid='config.db.request_started')
+request_finished.connect(lambda **kwargs: set_in_request(False), weak=False, dispatch_uid='config.db.request_finished')
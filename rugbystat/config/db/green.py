@@ -0,0 +1,32 @@
+"""
+psycopg2 under gevent.
+
+psycopg2 blocks in C while it waits for Postgres, which stalls every
+greenlet in the worker. ``patch_psycopg`` installs psycogreen's wait
+callback so the wait goes through the gevent hub instead, and
+``check_psycopg`` refuses to serve when that did not happen.
+"""
+from __future__ import absolute_import
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def patch_psycopg():
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+def check_psycopg():
+    from gevent import monkey
+    from psycogreen.gevent import gevent_wait_callback
+    from psycopg2 import extensions
+
+    problems = []
+    for module in ('socket', 'select', 'thread'):
+        if not monkey.is_module_patched(module):
+            problems.append('gevent has not patched {}'.format(module))
+    if extensions.get_wait_callback() is not gevent_wait_callback:
+        problems.append('psycopg2 has no gevent wait callback')
+    if problems:
+        raise ImproperlyConfigured(
+            'Database access would block the gevent worker: {}'.format(', '.join(problems)))
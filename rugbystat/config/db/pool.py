@@ -0,0 +1,153 @@
+"""
+A blocking pool of DB-API connections.
+
+Waiting is done on a ``threading.Condition`` looked up at call time, so once
+gevent has patched ``threading`` the pool hands connections out to greenlets
+instead of OS threads. Idle connections are pinged before being reused when
+they have sat unused for longer than ``check_interval`` seconds.
+
+Pools are kept per process in a registry, ``close_pools`` closes the idle
+connections of all of them.
+"""
+from __future__ import absolute_import
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool(object):
+
+    def __init__(self, connect, max_size=20, timeout=10, check_interval=30):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._reset_state()
+
+    def _reset_state(self):
+        self.pid = os.getpid()
+        self.size = 0
+        self._idle = deque()
+        self._lock = threading.Condition()
+
+    def _check_pid(self):
+        # connections inherited through fork() share their socket with the
+        # parent, forget them without closing so the parent keeps working
+        if self.pid != os.getpid():
+            self._reset_state()
+
+    def acquire(self):
+        self._check_pid()
+        deadline = time.time() + self.timeout
+        with self._lock:
+            while not self._idle and self.size >= self.max_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolTimeout('No database connection available after {}s'.format(self.timeout))
+                self._lock.wait(remaining)
+            if self._idle:
+                conn, released = self._idle.pop()
+            else:
+                conn, released = None, None
+            self.size += 1
+
+        try:
+            if conn is not None and not self.is_usable(conn, released):
+                self.discard(conn, reserved=True)
+                conn = None
+            if conn is None:
+                conn = self.connect()
+        except Exception:
+            self._free_slot()
+            raise
+        return conn
+
+    def release(self, conn):
+        if self.pid != os.getpid():
+            return
+        try:
+            if getattr(conn, 'closed', False):
+                raise ValueError('connection is closed')
+            # leave nothing open for the next borrower
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        with self._lock:
+            self.size -= 1
+            self._idle.append((conn, time.time()))
+            self._lock.notify()
+
+    def discard(self, conn, reserved=False):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        if not reserved:
+            self._free_slot()
+
+    def is_usable(self, conn, released):
+        if getattr(conn, 'closed', False):
+            return False
+        if time.time() - released < self.check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+            conn.rollback()
+        except Exception:
+            logger.info('Dropping a broken pooled database connection', exc_info=True)
+            return False
+        return True
+
+    def close_all(self):
+        self._check_pid()
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, released in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _free_slot(self):
+        with self._lock:
+            self.size -= 1
+            self._lock.notify()
+
+
+def get_pool(key, connect, **options):
+    """
+    Returns the pool registered under ``key``, creating it with ``connect``
+    and ``options`` the first time.
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(connect, **options)
+        return pool
+
+
+def close_pools():
+    """
+    Closes the idle connections of every pool. Call it before dropping a
+    database, Postgres refuses while other sessions are connected, and when
+    a process exits.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,120 @@
+"""
+Read replicas for API reads.
+
+``ReplicaMiddleware`` marks requests with a safe method as allowed to read
+from a replica; everything else, including rq jobs and management commands,
+reads from the primary. A request that writes sets a cookie that keeps the
+client on the primary for ``REPLICA_STICKY_SECONDS``, so it reads its own
+writes while they replicate. Replicas whose replay lag goes over
+``REPLICA_MAX_LAG`` seconds are skipped until they catch up.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LAG_QUERY = """
+    SELECT CASE WHEN pg_is_in_recovery()
+                THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                ELSE 0 END
+"""
+
+_state = threading.local()
+_lag = {}
+
+
+def replica_lag(alias):
+    """
+    Replay lag of a replica in seconds, measured at most once per
+    ``REPLICA_LAG_CHECK_INTERVAL``. An unreachable replica counts as lagging.
+
+    Postgres only knows when it last replayed a transaction, so an idle
+    primary looks like lag too; reads then go to the primary, which is idle
+    anyway.
+    """
+    checked, lag = _lag.get(alias, (0, None))
+    if time.time() - checked < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            lag = float(cursor.fetchone()[0])
+    except Exception:
+        logger.warning('Could not check the lag of %s', alias, exc_info=True)
+        lag = float('inf')
+    _lag[alias] = (time.time(), lag)
+    return lag
+
+
+def available_replicas():
+    return [alias for alias in settings.DATABASE_REPLICAS if replica_lag(alias) <= settings.REPLICA_MAX_LAG]
+
+
+@contextlib.contextmanager
+def use_primary():
+    """
+    Reads from the primary inside the block.
+    """
+    previous = getattr(_state, 'replica_reads', False)
+    _state.replica_reads = False
+    try:
+        yield
+    finally:
+        _state.replica_reads = previous
+
+
+class ReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, 'replica_reads', False) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = available_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = (DEFAULT_DB_ALIAS,) + tuple(settings.DATABASE_REPLICAS)
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware(object):
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica_reads = request.method in SAFE_METHODS and not self.is_sticky(request)
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.replica_reads = False
+        if _state.wrote and settings.DATABASE_REPLICAS:
+            sticky = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, str(int(time.time() + sticky)), max_age=sticky, httponly=True)
+        return response
+
+    def is_sticky(self, request):
+        try:
+            return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
@@ -0,0 +1,62 @@
+"""
+Gunicorn settings for the web dyno.
+
+The application is loaded and warmed up once in the master (``preload_app``)
+and workers are forked from it. Each worker runs gevent, so a request
+waiting on Postgres, Redis or S3 yields to the others instead of holding
+the whole process. Database
+connections come from the pool in ``config.db``; keep
+``WEB_CONCURRENCY * DATABASE_POOL_MAX_SIZE`` under the connection limit of
+the Postgres plan.
+
+    gunicorn -c rugbystat/config/gunicorn_conf.py wsgi:application
+"""
+import multiprocessing
+import os
+
+pythonpath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bind = '0.0.0.0:{}'.format(os.environ.get('PORT', '8000'))
+
+worker_class = 'gevent'
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    # Modules loaded in the master keep what they imported from threading
+    # and socket (Django's connection handler holds a threading.local), so
+    # gevent has to patch before the application is imported, not after fork
+    from gevent import monkey
+    monkey.patch_all()
+
+if os.environ.get('NEW_RELIC_LICENSE_KEY'):
+    # started here instead of through newrelic-admin so that only the web
+    # process pays for the agent, and before Django is imported so it can
+    # hook in
+    import newrelic.agent
+    newrelic.agent.initialize()
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# recycle workers now and then so a slow leak can't take a dyno down
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    from config.db.green import patch_psycopg
+    patch_psycopg()
+
+
+def post_worker_init(worker):
+    from config.db.green import check_psycopg
+    check_psycopg()
+
+
+def worker_exit(server, worker):
+    # let Postgres end the sessions now instead of when the sockets time out
+    from config.db.pool import close_pools
+    close_pools()
@@ -0,0 +1,134 @@
+"""
+Per-request performance metrics.
+
+PerformanceMiddleware records the view, SQL query count and time, cache
+hits and misses and the time spent rendering the response. The numbers are
+sent as ``Server-Timing`` headers and logged as JSON to the
+``rugbystat.performance`` logger. Views listed in ``QUERY_BUDGETS`` that run
+more queries than allowed log a warning, or raise ``QueryBudgetExceeded``
+when ``QUERY_BUDGET_STRICT`` is on (the test suite).
+"""
+from __future__ import absolute_import, division
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('rugbystat.performance')
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics(object):
+
+    def __init__(self):
+        self.started = time.time()
+        self.view = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_started = None
+        self.render_time = 0.0
+        self.queries = 0
+        self.query_time = 0.0
+
+
+def current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+def record_cache(hits=0, misses=0):
+    """
+    Counts cache lookups towards the current request, if any.
+    """
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def get_view_name(view_func, request):
+    cls = getattr(view_func, 'cls', None)
+    if cls is not None:
+        # DRF viewsets map the HTTP method to an action
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        return '{}.{}'.format(cls.__name__, action)
+    return '{}.{}'.format(view_func.__module__, getattr(view_func, '__name__', type(view_func).__name__))
+
+
+class PerformanceMiddleware(object):
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        debug_cursors = {}
+        for connection in connections.all():
+            debug_cursors[connection.alias] = (connection.force_debug_cursor, len(connection.queries_log))
+            connection.force_debug_cursor = True
+        try:
+            response = self.get_response(request)
+        finally:
+            for connection in connections.all():
+                force_debug_cursor, start = debug_cursors.get(connection.alias, (False, 0))
+                queries = list(connection.queries_log)[start:]
+                metrics.queries += len(queries)
+                metrics.query_time += sum(float(query['time']) for query in queries)
+                connection.force_debug_cursor = force_debug_cursor
+            _local.metrics = None
+
+        total = time.time() - metrics.started
+        response['Server-Timing'] = ', '.join((
+            'db;dur={:.1f};desc="{} queries"'.format(metrics.query_time * 1000, metrics.queries),
+            'cache;desc="{} hits, {} misses"'.format(metrics.cache_hits, metrics.cache_misses),
+            'render;dur={:.1f}'.format(metrics.render_time * 1000),
+            'total;dur={:.1f}'.format(total * 1000),
+        ))
+        logger.info('request', extra={'metrics': {
+            'view': metrics.view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'query_ms': round(metrics.query_time * 1000, 1),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'render_ms': round(metrics.render_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }})
+        self.check_budget(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.view = get_view_name(view_func, request)
+
+    def process_template_response(self, request, response):
+        # called right before render(), DRF serializes the response there
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.render_started = time.time()
+
+            def stop(response):
+                metrics.render_time += time.time() - metrics.render_started
+            response.add_post_render_callback(stop)
+        return response
+
+    def check_budget(self, metrics):
+        budget = settings.QUERY_BUDGETS.get(metrics.view)
+        if budget is None or metrics.queries <= budget:
+            return
+        message = '{} ran {} queries, its budget is {}'.format(metrics.view, metrics.queries, budget)
+        logger.warning(message, extra={'metrics': {'view': metrics.view, 'queries': metrics.queries,
+                                                   'budget': budget}})
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
@@ -0,0 +1,194 @@
+"""
+Batching, grouping and retries on top of django-rq.
+
+``enqueue_many`` creates a batch of jobs and pushes them with one pipelined
+Redis call, ``enqueue_in`` creates a job that runs after a delay. Jobs of a
+batch can share a ``JobGroup`` that counts finished and failed jobs, and
+can be retried with exponential backoff.
+
+``Worker`` (``rqworker --worker-class config.jobs.Worker``) imports the
+modules in ``RQ_PRELOAD`` once before it starts forking, so a work horse
+starts with everything already loaded instead of importing it for every
+job. It also keeps the group counters and schedules retries.
+"""
+from __future__ import absolute_import
+
+import importlib
+import time
+import uuid
+
+import django_rq
+from django.conf import settings
+from django.db import connections
+from rq import Worker as BaseWorker
+from rq.exceptions import DequeueTimeout, NoSuchJobError
+from rq.worker import WorkerStatus
+
+GROUP_KEY = 'rq:group:{}'
+RETRY_KEY = 'rq:retry:{}'
+
+
+class JobGroup(object):
+    """
+    Progress of a batch of jobs, kept in a Redis hash for ``RQ_GROUP_TTL``
+    seconds after the last change.
+    """
+
+    def __init__(self, id=None, connection=None):
+        self.id = id or uuid.uuid4().hex
+        self.connection = connection or django_rq.get_connection()
+
+    @property
+    def key(self):
+        return GROUP_KEY.format(self.id)
+
+    def add(self, count, pipeline=None):
+        connection = pipeline if pipeline is not None else self.connection
+        connection.hincrby(self.key, 'total', count)
+        connection.expire(self.key, settings.RQ_GROUP_TTL)
+
+    def mark(self, field):
+        pipeline = self.connection.pipeline()
+        pipeline.hincrby(self.key, field, 1)
+        pipeline.expire(self.key, settings.RQ_GROUP_TTL)
+        pipeline.execute()
+
+    def status(self):
+        counts = self.connection.hgetall(self.key)
+        total, finished, failed = (int(counts.get(name, 0)) for name in (b'total', b'finished', b'failed'))
+        return {
+            'total': total,
+            'finished': finished,
+            'failed': failed,
+            'pending': total - finished - failed,
+            'done': finished + failed >= total,
+        }
+
+
+def enqueue_many(calls, queue='default', group=None, retries=0, timeout=None, result_ttl=None):
+    """
+    Enqueues ``(func, args, kwargs)`` calls with a single pipelined request
+    and returns the jobs. Failed jobs are retried up to ``retries`` times,
+    waiting ``RQ_RETRY_BACKOFF * 2 ** attempt`` seconds in between.
+    """
+    queue = django_rq.get_queue(queue)
+    meta = {'retries': retries, 'attempt': 0}
+    if group is not None:
+        meta['group'] = group.id
+
+    jobs = [queue.job_class.create(func, args=args, kwargs=kwargs, connection=queue.connection,
+                                   timeout=timeout, result_ttl=result_ttl, origin=queue.name,
+                                   meta=dict(meta))
+            for func, args, kwargs in calls]
+    if not jobs:
+        return jobs
+
+    pipeline = queue.connection.pipeline()
+    if group is not None:
+        group.add(len(jobs), pipeline=pipeline)
+    for job in jobs:
+        queue.enqueue_job(job, pipeline=pipeline)
+    pipeline.execute()
+    return jobs
+
+
+def enqueue_in(delay, func, args=(), kwargs=None, queue='default', **options):
+    """
+    Creates a job that is put on ``queue`` after ``delay`` seconds. Until
+    then it waits in the retry set of the queue, so a ``Worker`` listening
+    on that queue has to be running.
+    """
+    queue = django_rq.get_queue(queue)
+    job = queue.job_class.create(func, args=args, kwargs=kwargs or {}, connection=queue.connection,
+                                 origin=queue.name, **options)
+    pipeline = queue.connection.pipeline()
+    job.save(pipeline=pipeline)
+    pipeline.execute_command('ZADD', RETRY_KEY.format(queue.name), time.time() + delay, job.id)
+    pipeline.execute()
+    return job
+
+
+def backoff(attempt):
+    return settings.RQ_RETRY_BACKOFF * 2 ** attempt
+
+
+def preload():
+    for name in settings.RQ_PRELOAD:
+        importlib.import_module(name)
+
+
+class Worker(BaseWorker):
+
+    def __init__(self, *args, **kwargs):
+        super(Worker, self).__init__(*args, **kwargs)
+        # exception handlers run last-pushed first
+        self.push_exc_handler(self.retry_handler)
+        preload()
+
+    def fork_work_horse(self, job, queue):
+        # the horse must not share database sockets with this process
+        connections.close_all()
+        return super(Worker, self).fork_work_horse(job, queue)
+
+    def handle_job_success(self, job, queue, started_job_registry):
+        super(Worker, self).handle_job_success(job, queue, started_job_registry)
+        if job.meta.get('group'):
+            JobGroup(job.meta['group'], self.connection).mark('finished')
+
+    def retry_handler(self, job, *exc_info):
+        attempt = job.meta.get('attempt', 0)
+        if attempt >= job.meta.get('retries', 0):
+            if job.meta.get('group'):
+                JobGroup(job.meta['group'], self.connection).mark('failed')
+            # on to the failed queue
+            return True
+
+        delay = backoff(attempt)
+        job.meta['attempt'] = attempt + 1
+        job.save_meta()
+        self.connection.execute_command('ZADD', RETRY_KEY.format(job.origin), time.time() + delay, job.id)
+        self.log.info('Retrying %s in %ss (attempt %s of %s)', job.id, delay, attempt + 1, job.meta['retries'])
+        return False
+
+    def promote_retries(self):
+        """
+        Puts jobs whose backoff has passed back on their queue.
+        """
+        now = time.time()
+        for queue in self.queues:
+            key = RETRY_KEY.format(queue.name)
+            for job_id in self.connection.zrangebyscore(key, 0, now):
+                # zrem decides which worker gets to requeue the job
+                if not self.connection.zrem(key, job_id):
+                    continue
+                try:
+                    job = self.job_class.fetch(job_id.decode(), connection=self.connection)
+                except NoSuchJobError:
+                    continue
+                queue.enqueue_job(job)
+
+    def dequeue_job_and_maintain_ttl(self, timeout):
+        # Same as rq's, but the blocking pop is cut into RQ_RETRY_POLL
+        # slices so due retries are requeued between them
+        result = None
+        qnames = ','.join(self.queue_names())
+
+        self.set_state(WorkerStatus.IDLE)
+        self.procline('Listening on ' + qnames)
+
+        while True:
+            self.heartbeat()
+            self.promote_retries()
+            poll = None if timeout is None else min(timeout, settings.RQ_RETRY_POLL)
+            try:
+                result = self.queue_class.dequeue_any(self.queues, poll, connection=self.connection,
+                                                      job_class=self.job_class)
+                if result is not None:
+                    job, queue = result
+                    self.log.info('%s: %s (%s)', queue.name, job.description, job.id)
+                break
+            except DequeueTimeout:
+                pass
+
+        self.heartbeat()
+        return result
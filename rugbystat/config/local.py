@@ -1,4 +1,6 @@
+import copy
 import os
+import sys
 from .common import Common
 from configurations import values
 
@@ -14,7 +16,8 @@ class Local(Common):
     # Testing
     INSTALLED_APPS = Common.INSTALLED_APPS
     INSTALLED_APPS += ('django_nose',)
-    TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
+    TEST_RUNNER = 'config.runner.TestRunner'
+    QUERY_BUDGET_STRICT = values.BooleanValue(len(sys.argv) > 1 and sys.argv[1] == 'test')
     NOSE_ARGS = [
         BASE_DIR,
         '-s',
@@ -24,6 +27,14 @@ class Local(Common):
         '--cover-package={}'.format(BASE_DIR)
     ]
 
+    # Throttle windows in process memory, no Redis needed
+    THROTTLE_BACKEND = values.Value('authentication.throttling.LocalSlidingWindow')
+
+    # Only query budget overruns from the performance logger, the rest is
+    # in the Server-Timing headers
+    LOGGING = copy.deepcopy(Common.LOGGING)
+    LOGGING['loggers']['rugbystat.performance']['level'] = 'WARNING'
+
     # Mail
     EMAIL_HOST = 'localhost'
     EMAIL_PORT = 1025
@@ -33,11 +44,22 @@ class Local(Common):
     VERSATILEIMAGEFIELD_SETTINGS = Common.VERSATILEIMAGEFIELD_SETTINGS
     VERSATILEIMAGEFIELD_SETTINGS['create_images_on_demand'] = True
 
-    # Django RQ local settings
+    # Django RQ local settings. A worker listening on all queues takes from high
+    # first; quick jobs such as emails go there, imports and renditions to bulk.
     RQ_QUEUES = {
+        'high': {
+            'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
+            'DB': 0,
+            'DEFAULT_TIMEOUT': 60,
+        },
         'default': {
             'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
             'DB': 0,
             'DEFAULT_TIMEOUT': 500,
         },
+        'bulk': {
+            'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
+            'DB': 0,
+            'DEFAULT_TIMEOUT': 3600,
+        },
     }
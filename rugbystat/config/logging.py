@@ -1,5 +1,28 @@
+from __future__ import absolute_import
+
+import json
+import logging
+
 __author__ = 'krnr'
 
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the ``metrics`` passed in ``extra``
+    merged in, so log drains can index the fields.
+    """
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'metrics', {}))
+        return json.dumps(payload, sort_keys=True, default=str)
+
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -18,6 +41,9 @@ LOGGING = {
             'format': '%(asctime)s %(message)s',
             'datefmt': '%H:%M:%S',
         },
+        'json': {
+            '()': 'config.logging.JSONFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
@@ -42,10 +68,20 @@ LOGGING = {
             'formatter': 'rq_console',
             'exclude': ['%(asctime)s'],
         },
+        # both write from a background thread, see config.loghandlers
         'mail_admins': {
             'level': 'ERROR',
-            'class': 'django.utils.log.AdminEmailHandler'
-        }
+            'class': 'config.loghandlers.QueuedHandler',
+            'handler': 'config.loghandlers.DigestAdminEmailHandler',
+        },
+        # not limited to DEBUG = False, Local lowers the logger to WARNING
+        # so that query budget overruns show up in development
+        'performance': {
+            'level': 'INFO',
+            'class': 'config.loghandlers.QueuedHandler',
+            'handler': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -65,6 +101,11 @@ LOGGING = {
         'rq.worker': {
             'handlers': ['rq_console'],
             'level': 'DEBUG'
-        }
+        },
+        'rugbystat.performance': {
+            'handlers': ['performance'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     }
 }
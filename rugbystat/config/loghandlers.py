@@ -0,0 +1,253 @@
+"""
+Logging handlers that keep slow work out of the thread that logs.
+
+``QueuedHandler`` puts records on an in-process queue that a background
+thread (a ``QueueListener``) hands to the real handler, so writing a log
+line or mailing an error never blocks a request.
+
+``DigestAdminEmailHandler`` replaces Django's ``AdminEmailHandler``: the
+first occurrence of an error opens a ``LOG_DIGEST_WINDOW`` second window in
+the cache and schedules an rq job for its end; identical errors within the
+window only bump a counter. The job sends one mail with the count and the
+first report, so an error storm costs one mail per distinct error. When the
+cache or rq can't be reached, often during the outage being reported, the
+report is mailed at once instead, at most once per window and error in each
+process.
+"""
+from __future__ import absolute_import
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import mail_admins
+from django.utils.log import AdminEmailHandler
+from django.utils.module_loading import import_string
+from django.utils.six.moves import queue
+
+from .jobs import enqueue_in
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:  # Python 2, the parts of the Python 3 classes used here
+    class QueueHandler(logging.Handler):
+
+        def __init__(self, queue):
+            logging.Handler.__init__(self)
+            self.queue = queue
+
+        def enqueue(self, record):
+            self.queue.put_nowait(record)
+
+        def prepare(self, record):
+            return record
+
+        def emit(self, record):
+            try:
+                self.enqueue(self.prepare(record))
+            except Exception:
+                self.handleError(record)
+
+    class QueueListener(object):
+        _sentinel = None
+
+        def __init__(self, queue, *handlers):
+            self.queue = queue
+            self.handlers = handlers
+            self._thread = None
+
+        def start(self):
+            self._thread = threading.Thread(target=self._monitor)
+            self._thread.daemon = True
+            self._thread.start()
+
+        def _monitor(self):
+            while True:
+                record = self.queue.get()
+                if record is self._sentinel:
+                    break
+                for handler in self.handlers:
+                    handler.handle(record)
+
+        def stop(self):
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+DIGEST_KEY = 'log-digest:{}'
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Passes records to an instance of the ``handler`` class (a dotted path,
+    built with the remaining keyword arguments) from a background thread.
+
+    The thread is started on first use in every process, since a forked
+    child does not inherit it. When ``capacity`` records are waiting, new
+    ones are dropped rather than blocking the caller.
+    """
+
+    def __init__(self, handler, capacity=10000, **options):
+        QueueHandler.__init__(self, queue.Queue(capacity))
+        self.target = import_string(handler)(**options)
+        self.capacity = capacity
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self.listener_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        QueueHandler.setFormatter(self, fmt)
+        self.target.setFormatter(fmt)
+
+    def start(self):
+        with self.listener_lock:
+            if self.pid == os.getpid():
+                return
+            # the queue of the parent may have been copied mid-operation
+            self.queue = queue.Queue(self.capacity)
+            self.listener = QueueListener(self.queue, self.target)
+            self.listener.start()
+            self.pid = os.getpid()
+        atexit.register(self.stop)
+
+    def stop(self):
+        with self.listener_lock:
+            if self.listener is not None and self.pid == os.getpid():
+                self.listener.stop()
+            self.listener = self.pid = None
+
+    def prepare(self, record):
+        # the record stays in this process, so unlike QueueHandler it is
+        # passed on as is, exc_info included, after whatever the target
+        # wants done while the logging thread is still around
+        prepare = getattr(self.target, 'prepare', None)
+        return record if prepare is None else prepare(record)
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def fingerprint(record):
+    """
+    Identifies an error by logger, level, exception type and the line that
+    raised it (or logged it, without an exception).
+    """
+    exc_type, filename, lineno = None, record.pathname, record.lineno
+    if record.exc_info and record.exc_info[0] is not None:
+        exc_type = record.exc_info[0].__name__
+        frames = traceback.extract_tb(record.exc_info[2])
+        if frames:
+            filename, lineno = frames[-1][:2]
+    value = '{}:{}:{}:{}:{}'.format(record.name, record.levelno, exc_type, filename, lineno)
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def add_to_digest(key, subject, message):
+    """
+    Counts an error, scheduling its digest mail if it opens a new window.
+    """
+    cache = caches[settings.LOG_DIGEST_CACHE]
+    window = settings.LOG_DIGEST_WINDOW
+    entry_key, count_key = DIGEST_KEY.format(key), DIGEST_KEY.format(key) + ':count'
+    # kept well past the window in case the queue is slow to run the job
+    timeout = window * 10
+    if cache.add(entry_key, {'subject': subject, 'message': message, 'first': time.time()}, timeout):
+        try:
+            cache.set(count_key, 1, timeout)
+            enqueue_in(window, send_error_digest, (key,), queue=settings.LOG_DIGEST_QUEUE)
+        except Exception:
+            # without its job the window would swallow the error until the
+            # entry expires, let the next occurrence open it again
+            cache.delete(entry_key)
+            raise
+        return
+    try:
+        cache.incr(count_key)
+    except ValueError:
+        cache.set(count_key, 1, timeout)
+
+
+def send_error_digest(key):
+    """
+    rq job: mails the admins the first report of an error and how often it
+    was logged since. Returns that count.
+    """
+    cache = caches[settings.LOG_DIGEST_CACHE]
+    entry_key, count_key = DIGEST_KEY.format(key), DIGEST_KEY.format(key) + ':count'
+    entry, count = cache.get(entry_key), cache.get(count_key) or 1
+    # an occurrence counted between the get and the delete is lost, which
+    # costs one in the count at worst
+    cache.delete_many([entry_key, count_key])
+    if entry is None:
+        return 0
+
+    subject, message = entry['subject'], entry['message']
+    if count > 1:
+        subject = '[{}x] {}'.format(count, subject)
+        message = 'Logged {} times in {:.0f} seconds, the first report follows.\n\n{}'.format(
+            count, time.time() - entry['first'], message)
+    mail_admins(subject, message, fail_silently=True)
+    return count
+
+
+class DigestAdminEmailHandler(AdminEmailHandler):
+    """
+    ``AdminEmailHandler`` that adds reports to the error digest instead of
+    sending them. Reports are rendered in ``prepare``, while the request of
+    the record can still be read; ``emit`` only talks to the cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DigestAdminEmailHandler, self).__init__(*args, **kwargs)
+        self.rendered = threading.local()
+        # fingerprint -> end of its window, for reports mailed directly
+        self.mailed = {}
+        self.mailed_lock = threading.Lock()
+
+    def prepare(self, record):
+        if not hasattr(record, 'digest'):
+            super(DigestAdminEmailHandler, self).emit(record)
+            subject, message = self.rendered.mail
+            record.digest = (fingerprint(record), subject, message)
+        return record
+
+    def send_mail(self, subject, message, *args, **kwargs):
+        self.rendered.mail = (subject, message)
+
+    def emit(self, record):
+        try:
+            digest = self.prepare(record).digest
+            try:
+                add_to_digest(*digest)
+            except Exception:
+                self.mail_directly(*digest)
+        except Exception:
+            self.handleError(record)
+
+    def mail_directly(self, key, subject, message):
+        """
+        Mails a report that could not be added to the digest, unless the
+        same error was mailed directly less than ``LOG_DIGEST_WINDOW``
+        seconds ago.
+        """
+        now = time.time()
+        with self.mailed_lock:
+            if self.mailed.get(key, 0) > now:
+                return
+            for other, ends in list(self.mailed.items()):
+                if ends <= now:
+                    del self.mailed[other]
+            self.mailed[key] = now + settings.LOG_DIGEST_WINDOW
+        mail_admins(subject, message, fail_silently=True)
@@ -1,6 +1,5 @@
 import os
 from configurations import values
-from boto.s3.connection import OrdinaryCallingFormat
 from .common import Common
 
 try:
@@ -17,6 +16,11 @@ class Production(Common):
     # https://devcenter.heroku.com/articles/getting-started-with-django
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
+    # The Heroku router appends the client address to X-Forwarded-For; only
+    # that entry identifies a client for the throttles, the rest is whatever
+    # the client sent
+    REST_FRAMEWORK = dict(Common.REST_FRAMEWORK, NUM_PROXIES=1)
+
     INSTALLED_APPS = Common.INSTALLED_APPS
     SECRET_KEY = values.SecretValue()
 
@@ -51,7 +55,7 @@ class Production(Common):
     # Media files
     # http://django-storages.readthedocs.org/en/latest/index.html
     INSTALLED_APPS += ('storages',)
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto.S3BotoStorage'
+    DEFAULT_FILE_STORAGE = 'media.storage.S3Storage'
     AWS_ACCESS_KEY_ID = values.Value('DJANGO_AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = values.Value('DJANGO_AWS_SECRET_ACCESS_KEY')
     AWS_STORAGE_BUCKET_NAME = values.Value('DJANGO_AWS_STORAGE_BUCKET_NAME')
@@ -59,7 +63,6 @@ class Production(Common):
     AWS_AUTO_CREATE_BUCKET = True
     AWS_QUERYSTRING_AUTH = False
     MEDIA_URL = 'https://s3.amazonaws.com/{}/'.format(AWS_STORAGE_BUCKET_NAME)
-    AWS_S3_CALLING_FORMAT = OrdinaryCallingFormat()
 
     # https://developers.google.com/web/fundamentals/performance/optimizing-content-efficiency/http-caching#cache-control
     # Response can be cached by browser and any intermediary caches (i.e. it is "public") for up to 1 day
@@ -71,15 +74,20 @@ class Production(Common):
     # Static files
     STATICFILES_STORAGE = 'whitenoise.django.GzipManifestStaticFilesStorage'
 
-    # Caching
+    # Caching. The Redis server is a redistogo:nano shared with rq, so
+    # values are kept compact (see config.cache.backends) and counted per prefix.
     redis_url = urlparse.urlparse(os.environ.get('REDISTOGO_URL', 'redis://localhost:6379'))
     CACHES = {
         'default': {
-            'BACKEND': 'redis_cache.RedisCache',
+            'BACKEND': 'config.cache.backends.RedisCache',
             'LOCATION': '{}:{}'.format(redis_url.hostname, redis_url.port),
             'OPTIONS': {
                 'DB': 0,
                 'PASSWORD': redis_url.password,
+                'MSGPACK': True,
+                'COMPRESS_MIN_LENGTH': 1024,
+                # session keys have no ':' after their prefix
+                'STATS_PREFIXES': ('config.sessions',),
                 'PARSER_CLASS': 'redis.connection.HiredisParser',
                 'CONNECTION_POOL_CLASS': 'redis.BlockingConnectionPool',
                 'CONNECTION_POOL_CLASS_KWARGS': {
@@ -90,13 +98,24 @@ class Production(Common):
         }
     }
 
-    # Django RQ production settings
+    # Django RQ production settings. A worker listening on all queues takes from high
+    # first; quick jobs such as emails go there, imports and renditions to bulk.
     RQ_QUEUES = {
+        'high': {
+            'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
+            'DB': 0,
+            'DEFAULT_TIMEOUT': 60,
+        },
         'default': {
             'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
             'DB': 0,
             'DEFAULT_TIMEOUT': 500,
         },
+        'bulk': {
+            'URL': os.getenv('REDISTOGO_URL', 'redis://localhost:6379'),
+            'DB': 0,
+            'DEFAULT_TIMEOUT': 3600,
+        },
     }
 
     Common.VERSATILEIMAGEFIELD_SETTINGS['create_images_on_demand'] = False
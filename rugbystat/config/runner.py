@@ -0,0 +1,16 @@
+from __future__ import absolute_import
+
+from django_nose import NoseTestSuiteRunner
+
+from config.db.pool import close_pools
+
+
+class TestRunner(NoseTestSuiteRunner):
+    """
+    ``django_nose`` runner that closes the pooled database connections
+    before the test databases are dropped.
+    """
+
+    def teardown_databases(self, *args, **kwargs):
+        close_pools()
+        return super(TestRunner, self).teardown_databases(*args, **kwargs)
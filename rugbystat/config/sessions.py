@@ -0,0 +1,85 @@
+"""
+Cached, database-backed sessions that skip writes which change nothing.
+
+Used as ``SESSION_ENGINE``. Reads are served from the cache, writes go
+through to the database. A save is dropped when the session data is what
+was loaded and the new expiry lands within ``SESSION_WRITE_GRACE`` seconds
+of the stored one, so refreshing the expiry on every request costs at most
+one write per grace window.
+"""
+from __future__ import absolute_import
+
+import copy
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.core.exceptions import SuspiciousOperation
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+KEY_PREFIX = 'config.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super(SessionStore, self).__init__(session_key)
+        self._stored = None
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+
+        if entry is None:
+            try:
+                s = self.model.objects.get(session_key=self.session_key, expire_date__gt=timezone.now())
+            except (self.model.DoesNotExist, SuspiciousOperation) as e:
+                if isinstance(e, SuspiciousOperation):
+                    logger = logging.getLogger('django.security.%s' % e.__class__.__name__)
+                    logger.warning(force_text(e))
+                self._session_key = None
+                return {}
+            entry = {'data': self.decode(s.session_data), 'expiry': s.expire_date}
+            self._cache.set(self.cache_key, entry, self.get_expiry_age(expiry=s.expire_date))
+
+        self._stored = (copy.deepcopy(entry['data']), entry['expiry'])
+        return entry['data']
+
+    def is_unchanged(self):
+        if self._stored is None:
+            return False
+        data, expiry = self._stored
+        grace = settings.SESSION_WRITE_GRACE
+        return self._session == data and abs((self.get_expiry_date() - expiry).total_seconds()) < grace
+
+    def save(self, must_create=False):
+        if not must_create and self.session_key is not None and self.is_unchanged():
+            return
+        DBStore.save(self, must_create)
+        expiry = self.get_expiry_date()
+        self._cache.set(self.cache_key, {'data': self._session, 'expiry': expiry}, self.get_expiry_age())
+        self._stored = (copy.deepcopy(self._session), expiry)
+
+
+def purge_expired_sessions(batch_size=1000):
+    """
+    rq job: deletes expired session rows in batches, so no single DELETE
+    holds locks on a large part of the table. Returns the number of rows
+    removed.
+    """
+    batch_size = int(batch_size)
+    now = timezone.now()
+    total = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now)
+                                   .values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return total
+        Session.objects.filter(session_key__in=keys).delete()
+        total += len(keys)
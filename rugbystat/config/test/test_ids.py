@@ -0,0 +1,54 @@
+import uuid
+
+from django.test import TestCase
+from mock import patch
+from nose.tools import eq_, ok_
+
+from config.ids import uuid7, uuid7_time
+from users.benchmark import bench_inserts
+from users.models import User
+
+
+class TestUUID7(TestCase):
+
+    def setUp(self):
+        # forget keys made by earlier tests at the real time
+        patcher = patch('config.ids._last', [0, 0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_keys_are_version_7(self):
+        key = uuid7()
+        eq_(key.version, 7)
+        eq_(key.variant, uuid.RFC_4122)
+
+    def test_keys_sort_by_creation(self):
+        with patch('config.ids.time.time', return_value=1500000000.0):
+            same_millisecond = [uuid7() for i in range(100)]
+        with patch('config.ids.time.time', return_value=1500000000.001):
+            later = uuid7()
+
+        keys = same_millisecond + [later]
+        eq_(keys, sorted(keys))
+        eq_(len(set(keys)), len(keys))
+        eq_(uuid7_time(same_millisecond[0]), 1500000000.0)
+
+    def test_counter_overflow_moves_to_next_millisecond(self):
+        with patch('config.ids.time.time', return_value=1600000000.0):
+            keys = [uuid7() for i in range(5000)]
+
+        eq_(keys, sorted(keys))
+        ok_(uuid7_time(keys[-1]) > 1600000000.0)
+
+    def test_users_get_time_ordered_keys(self):
+        first, second = User.objects.create(username='first'), User.objects.create(username='second')
+        eq_(first.pk.version, 7)
+        ok_(first.pk < second.pk)
+
+    def test_bench_inserts(self):
+        result = bench_inserts(uuid7, 25, 10)
+
+        eq_(User.objects.count(), 25)
+        eq_(User.objects.filter(auth_token__isnull=False).count(), 25)
+        eq_(result['rows'], 25)
+        eq_(result['indexes'], {})
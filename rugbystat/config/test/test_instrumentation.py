@@ -0,0 +1,49 @@
+from django.test import override_settings
+from django.urls import reverse
+from mock import patch
+from nose.tools import eq_, ok_
+from rest_framework.test import APITestCase
+
+from config.instrumentation import QueryBudgetExceeded
+from users.test.factories import UserFactory
+
+
+class TestPerformanceMiddleware(APITestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.url)
+        timing = response['Server-Timing']
+        ok_('db;dur=' in timing)
+        ok_('desc="2 queries"' in timing)
+        ok_('render;dur=' in timing)
+
+    def test_metrics_are_logged(self):
+        with patch('config.instrumentation.logger') as logger:
+            self.client.get(self.url)
+        metrics = logger.info.call_args[1]['extra']['metrics']
+        eq_(metrics['view'], 'UserViewSet.retrieve')
+        eq_(metrics['queries'], 2)
+
+    @override_settings(QUERY_BUDGETS={'UserViewSet.retrieve': 1}, QUERY_BUDGET_STRICT=False)
+    def test_budget_overrun_is_logged(self):
+        with patch('config.instrumentation.logger') as logger:
+            response = self.client.get(self.url)
+        eq_(response.status_code, 200)
+        ok_(logger.warning.called)
+
+    @override_settings(QUERY_BUDGETS={'UserViewSet.retrieve': 1}, QUERY_BUDGET_STRICT=True)
+    def test_budget_overrun_fails_in_strict_mode(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
+
+    def test_cache_lookups_are_counted(self):
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(self.user.auth_token))
+        # the token, the generation of the user's responses and the rendered user
+        ok_('3 misses' in self.client.get(self.url)['Server-Timing'])
+        ok_('3 hits' in self.client.get(self.url)['Server-Timing'])
@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase, override_settings
+from mock import Mock, patch
+from nose.tools import eq_, ok_
+from rq import Queue
+from rq.job import Job
+
+from config.jobs import JobGroup, Worker, backoff, enqueue_in, enqueue_many
+
+
+@override_settings(RQ_RETRY_BACKOFF=10, RQ_GROUP_TTL=60)
+class TestJobs(SimpleTestCase):
+
+    def setUp(self):
+        self.connection = Mock()
+        self.queue = Queue('bulk', connection=self.connection)
+
+    def test_enqueue_many_uses_one_pipeline(self):
+        group = JobGroup('g1', connection=self.connection)
+        with patch('django_rq.get_queue', return_value=self.queue):
+            jobs = enqueue_many([(pow, (2, i), {}) for i in range(3)], queue='bulk', group=group, retries=1)
+
+        eq_(len(jobs), 3)
+        eq_(self.connection.pipeline.call_count, 1)
+        pipeline = self.connection.pipeline.return_value
+        eq_(pipeline.execute.call_count, 1)
+        pipeline.hincrby.assert_called_once_with('rq:group:g1', 'total', 3)
+        eq_(pipeline.rpush.call_count, 3)
+        eq_(jobs[0].meta, {'retries': 1, 'attempt': 0, 'group': 'g1'})
+
+    def test_enqueue_in_waits_in_retry_set(self):
+        with patch('django_rq.get_queue', return_value=self.queue), patch('time.time', return_value=1000.0):
+            job = enqueue_in(30, pow, (2, 3), queue='bulk')
+
+        pipeline = self.connection.pipeline.return_value
+        pipeline.execute_command.assert_called_once_with('ZADD', 'rq:retry:bulk', 1030.0, job.id)
+        eq_(pipeline.rpush.call_count, 0)
+        eq_(job.origin, 'bulk')
+
+    def test_backoff_doubles(self):
+        eq_([backoff(attempt) for attempt in range(3)], [10, 20, 40])
+
+    def test_group_status(self):
+        self.connection.hgetall.return_value = {b'total': b'5', b'finished': b'3', b'failed': b'1'}
+        status = JobGroup('g1', connection=self.connection).status()
+        eq_(status['pending'], 1)
+        ok_(not status['done'])
+
+
+@override_settings(RQ_RETRY_BACKOFF=10, RQ_GROUP_TTL=60, RQ_PRELOAD=())
+class TestWorkerRetries(SimpleTestCase):
+
+    def setUp(self):
+        self.connection = Mock()
+        self.worker = Worker([Queue('bulk', connection=self.connection)], connection=self.connection)
+        self.job = Job.create(pow, args=(2, 3), connection=self.connection, origin='bulk',
+                              meta={'retries': 2, 'attempt': 0, 'group': 'g1'})
+
+    def test_failed_job_is_scheduled_for_retry(self):
+        with patch('time.time', return_value=1000.0):
+            fallthrough = self.worker.retry_handler(self.job, ValueError, ValueError(), None)
+
+        ok_(not fallthrough)
+        eq_(self.job.meta['attempt'], 1)
+        self.connection.execute_command.assert_called_once_with('ZADD', 'rq:retry:bulk', 1010.0, self.job.id)
+
+    def test_last_attempt_goes_to_failed_queue(self):
+        self.job.meta['attempt'] = 2
+        fallthrough = self.worker.retry_handler(self.job, ValueError, ValueError(), None)
+
+        ok_(fallthrough)
+        self.connection.pipeline.return_value.hincrby.assert_called_with('rq:group:g1', 'failed', 1)
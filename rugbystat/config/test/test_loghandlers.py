@@ -0,0 +1,131 @@
+import logging
+import os
+import sys
+import threading
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from mock import patch
+from nose.tools import eq_, ok_
+from redis.exceptions import ConnectionError
+
+from config.loghandlers import DigestAdminEmailHandler, QueuedHandler, add_to_digest, send_error_digest
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.handled = []
+
+    def emit(self, record):
+        self.handled.append((self.format(record), threading.current_thread()))
+
+
+def make_record(message='Internal Server Error', exc_info=None, **extra):
+    record = logging.LogRecord('django.request', logging.ERROR, __file__, 1, message, (), exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def raise_error(where):
+    try:
+        if where == 'first':
+            raise ValueError('first')
+        raise ValueError('second')
+    except ValueError:
+        return sys.exc_info()
+
+
+class TestQueuedHandler(SimpleTestCase):
+
+    def setUp(self):
+        self.handler = QueuedHandler('config.test.test_loghandlers.ListHandler')
+        self.handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(self.handler.stop)
+
+    def test_records_are_handled_in_background(self):
+        self.handler.handle(make_record())
+        self.handler.stop()
+
+        eq_(len(self.handler.target.handled), 1)
+        message, thread = self.handler.target.handled[0]
+        eq_(message, 'ERROR Internal Server Error')
+        ok_(thread is not threading.current_thread())
+
+    def test_listener_is_restarted_after_fork(self):
+        self.handler.handle(make_record())
+        self.handler.pid = os.getpid() + 1
+
+        self.handler.handle(make_record())
+        self.handler.stop()
+        eq_(len(self.handler.target.handled), 2)
+
+    def test_full_queue_drops_records(self):
+        handler = QueuedHandler('config.test.test_loghandlers.ListHandler', capacity=1)
+        # pretend the listener runs, but nothing takes from the queue
+        handler.pid = os.getpid()
+
+        handler.handle(make_record())
+        handler.handle(make_record())
+        eq_(handler.dropped, 1)
+
+
+@override_settings(LOG_DIGEST_WINDOW=60, LOG_DIGEST_QUEUE='high', LOG_DIGEST_CACHE='default',
+                   ADMINS=[('Admin', 'admin@example.com')])
+class TestErrorDigest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch('config.loghandlers.enqueue_in')
+        self.enqueue_in = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_errors_are_mailed_once(self):
+        for i in range(3):
+            add_to_digest('key', 'ERROR: boom', 'Traceback')
+
+        self.enqueue_in.assert_called_once_with(60, send_error_digest, ('key',), queue='high')
+        eq_(send_error_digest('key'), 3)
+        eq_(len(mail.outbox), 1)
+        ok_(mail.outbox[0].subject.endswith('[3x] ERROR: boom'))
+        ok_(mail.outbox[0].body.startswith('Logged 3 times in '))
+
+    def test_window_closes_with_the_digest(self):
+        add_to_digest('key', 'ERROR: boom', 'Traceback')
+        send_error_digest('key')
+        add_to_digest('key', 'ERROR: boom', 'Traceback')
+
+        eq_(self.enqueue_in.call_count, 2)
+        eq_(send_error_digest('key'), 1)
+        eq_(mail.outbox[-1].body, 'Traceback')
+        eq_(send_error_digest('key'), 0)
+
+    def test_reports_are_mailed_directly_without_the_queue(self):
+        self.enqueue_in.side_effect = ConnectionError
+        handler = DigestAdminEmailHandler()
+        for where in ('first', 'first', 'second'):
+            handler.emit(make_record(exc_info=raise_error(where)))
+
+        eq_(len(mail.outbox), 2)
+        ok_("Exception Value: second" in mail.outbox[1].body)
+        # the next occurrence opens the window again once the queue is back
+        self.enqueue_in.side_effect = None
+        handler.emit(make_record(exc_info=raise_error('first')))
+        eq_(self.enqueue_in.call_count, 4)
+        eq_(len(mail.outbox), 2)
+
+    def test_handler_groups_by_raising_line(self):
+        handler = DigestAdminEmailHandler()
+        request = RequestFactory().get('/api/v1/users/')
+        for where in ('first', 'first', 'second'):
+            handler.emit(make_record('Internal Server Error: /api/v1/users/',
+                                     exc_info=raise_error(where), request=request, status_code=500))
+
+        eq_(self.enqueue_in.call_count, 2)
+        eq_(len(mail.outbox), 0)
+        first_key = self.enqueue_in.call_args_list[0][0][2][0]
+        send_error_digest(first_key)
+        ok_('[2x] ERROR (EXTERNAL IP): Internal Server Error: /api/v1/users/' in mail.outbox[0].subject)
+        ok_("Exception Value: first" in mail.outbox[0].body)
@@ -0,0 +1,125 @@
+import datetime
+import pickle
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils.six import StringIO
+from mock import Mock, patch
+from nose.tools import eq_, ok_
+
+from config.cache.backends import RedisCache
+
+
+def make_cache(**options):
+    options.setdefault('MSGPACK', True)
+    cache = RedisCache('localhost:6379', {'OPTIONS': dict(DB=0, **options)})
+    cache.master_client = Mock()
+    return cache
+
+
+class TestValues(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = make_cache(COMPRESS_MIN_LENGTH=100)
+
+    def round_trip(self, value):
+        data = self.cache.prep_value(value)
+        eq_(self.cache.get_value(data), value)
+        return data
+
+    def test_plain_values_use_msgpack(self):
+        data = self.round_trip({'name': u'Slava', 'scores': [24, 9], 'rate': 2.5, 'raw': b'\x00'})
+        eq_(data[:1], b'm')
+        ok_(len(data) < len(pickle.dumps({'name': u'Slava', 'scores': [24, 9], 'rate': 2.5, 'raw': b'\x00'}, -1)))
+
+    def test_other_values_fall_back_to_pickle(self):
+        eq_(self.round_trip(datetime.date(1985, 5, 1))[:1], b'p')
+        eq_(self.round_trip((1, 2))[:1], b'p')
+
+    def test_large_values_are_compressed(self):
+        data = self.round_trip(u'Slava Moscow ' * 100)
+        eq_(data[:1], b'z')
+        ok_(len(data) < 100)
+        eq_(self.round_trip(u'short')[:1], b'm')
+
+    def test_integers_are_stored_as_is(self):
+        eq_(self.round_trip(42), b'42')
+
+    def test_values_of_previous_backend_are_read(self):
+        eq_(self.cache.get_value(pickle.dumps({'a': 1}, -1)), {'a': 1})
+
+    def test_msgpack_option_needs_msgpack(self):
+        with patch('config.cache.backends.msgpack', None):
+            with self.assertRaises(ImproperlyConfigured):
+                make_cache()
+            eq_(make_cache(MSGPACK=False).get_value(make_cache(MSGPACK=False).prep_value([1])), [1])
+
+
+class TestCommands(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = make_cache()
+        self.pipeline = self.cache.master_client.pipeline.return_value
+
+    def test_set_many_is_one_pipeline(self):
+        self.pipeline.execute.return_value = [True, True, 1, 1, 1]
+        self.cache.set_many({'user-response:1': u'a', 'user-response:2': u'b'}, 60)
+
+        self.cache.master_client.pipeline.assert_called_once_with(transaction=False)
+        eq_(self.pipeline.execute.call_count, 1)
+        eq_(sorted(call[1]['ex'] for call in self.pipeline.set.call_args_list), [60, 60])
+        eq_(sorted(call[0][1:] for call in self.pipeline.hincrby.call_args_list),
+            [('user-response:bytes', 6), ('user-response:raw_bytes', 6), ('user-response:sets', 2)])
+
+    def test_add_is_one_command(self):
+        self.pipeline.execute.return_value = [None, 1, 1, 1]
+
+        eq_(self.cache.add('log-digest:abc', 1, 30), False)
+        args, kwargs = self.pipeline.set.call_args
+        eq_((str(args[0]), args[1], kwargs), (':1:log-digest:abc', b'1', {'ex': 30, 'nx': True}))
+
+    def test_zero_timeout_is_not_stored(self):
+        eq_(self.cache.set('user-response:1', u'a', 0), False)
+        eq_(self.cache.add('user-response:2', u'b', 0), False)
+
+        ok_(not self.pipeline.set.called)
+        eq_([str(key) for key in self.cache.master_client.delete.call_args[0]], [':1:user-response:1'])
+
+    def test_get_many_counts_in_the_same_call(self):
+        self.cache._get_counted = Mock(return_value=[self.cache.prep_value(u'url'), None])
+
+        eq_(self.cache.get_many(['renditions:index:a', 'config.sessionsabc']), {'renditions:index:a': u'url'})
+        kwargs = self.cache._get_counted.call_args[1]
+        eq_([str(key) for key in kwargs['keys']], [':1:renditions:index:a', ':1:config.sessionsabc'])
+        eq_(kwargs['args'], ['cache-stats', 'renditions', 'other'])
+        eq_(self.cache.master_client.mget.called, False)
+
+    def test_get_without_stats(self):
+        cache = make_cache(STATS_KEY=None)
+        cache.master_client.mget.return_value = [None]
+
+        eq_(cache.get('auth-user:1', 'default'), 'default')
+        cache.master_client.mget.assert_called_once_with([':1:auth-user:1'])
+
+    def test_stats_prefixes(self):
+        cache = make_cache(STATS_PREFIXES=['config.sessions'])
+        eq_(cache.key_group('config.sessionsabc'), 'config.sessions')
+
+
+class TestCacheStatsCommand(SimpleTestCase):
+
+    def test_prints_ratio_per_prefix(self):
+        cache = make_cache()
+        cache.master_client.hgetall.return_value = {
+            b'user-response:hits': b'30', b'user-response:misses': b'10', b'user-response:sets': b'10',
+            b'user-response:bytes': b'5000', b'user-response:raw_bytes': b'20000', b'auth-user:misses': b'1',
+        }
+        out = StringIO()
+
+        with patch('core.management.commands.cache_stats.caches', {'default': cache}):
+            call_command('cache_stats', reset=True, stdout=out)
+        lines = out.getvalue().splitlines()
+        eq_(lines[1].split(), ['auth-user', '0', '1', '0%', '0', '-', '-'])
+        eq_(lines[2].split(), ['user-response', '30', '10', '75%', '10', '500', '25%'])
+        cache.master_client.delete.assert_called_once_with('cache-stats')
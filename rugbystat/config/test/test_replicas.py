@@ -0,0 +1,79 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from mock import patch
+from nose.tools import eq_, ok_
+
+from config.db import add_replicas
+from config.db.routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter, _state, use_primary
+from users.models import User
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_MAX_LAG=5, REPLICA_STICKY_SECONDS=10)
+class TestReplicaRouter(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.lag = patch('config.db.routers.replica_lag', return_value=0.5)
+        self.lag.start()
+        self.addCleanup(self.lag.stop)
+
+    def read_during(self, request):
+        seen = {}
+
+        def get_response(request):
+            seen['db'] = self.router.db_for_read(User)
+            if request.method == 'POST':
+                self.router.db_for_write(User)
+            return HttpResponse()
+        response = ReplicaMiddleware(get_response)(request)
+        return seen['db'], response
+
+    def test_reads_outside_requests_use_primary(self):
+        eq_(self.router.db_for_read(User), 'default')
+
+    def test_safe_requests_read_from_replica(self):
+        db, response = self.read_during(self.factory.get('/'))
+        eq_(db, 'replica1')
+        ok_(STICKY_COOKIE not in response.cookies)
+        ok_(not _state.replica_reads)
+
+    def test_lagging_replica_is_skipped(self):
+        with patch('config.db.routers.replica_lag', return_value=30):
+            db, response = self.read_during(self.factory.get('/'))
+        eq_(db, 'default')
+
+    def test_writes_make_client_sticky(self):
+        db, response = self.read_during(self.factory.post('/'))
+        eq_(db, 'default')
+        ok_(float(response.cookies[STICKY_COOKIE].value) > time.time())
+
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        eq_(self.read_during(request)[0], 'default')
+
+    def test_use_primary(self):
+        _state.replica_reads = True
+        try:
+            with use_primary():
+                eq_(self.router.db_for_read(User), 'default')
+            eq_(self.router.db_for_read(User), 'replica1')
+        finally:
+            _state.replica_reads = False
+
+    def test_replicas_are_not_migrated(self):
+        ok_(not self.router.allow_migrate('replica1', 'users'))
+        ok_(self.router.allow_migrate('default', 'users'))
+
+
+class TestAddReplicas(SimpleTestCase):
+
+    def test_replicas_get_aliases(self):
+        databases = {}
+        aliases = add_replicas(databases, ['postgres://u:p@replica-a/db', 'postgres://u:p@replica-b/db'])
+        eq_(aliases, ['replica1', 'replica2'])
+        eq_(databases['replica2']['HOST'], 'replica-b')
+        eq_(databases['replica1']['ENGINE'], 'config.db')
+        eq_(databases['replica1']['TEST'], {'MIRROR': 'default'})
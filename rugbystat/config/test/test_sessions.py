@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from nose.tools import eq_, ok_
+
+from config.sessions import SessionStore, purge_expired_sessions
+
+
+class SessionStoreTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['user'] = 'ivan'
+        session.save()
+        self.key = session.session_key
+
+    def test_data_is_read_from_cache(self):
+        with self.assertNumQueries(0):
+            eq_(SessionStore(self.key)['user'], 'ivan')
+
+    def test_data_is_read_from_database_on_cache_miss(self):
+        cache.clear()
+        eq_(SessionStore(self.key)['user'], 'ivan')
+
+    def test_unchanged_session_is_not_written(self):
+        session = SessionStore(self.key)
+        session['user'] = 'ivan'
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_modified_session_is_written(self):
+        session = SessionStore(self.key)
+        session['user'] = 'pyotr'
+        session.save()
+
+        cache.clear()
+        eq_(SessionStore(self.key)['user'], 'pyotr')
+
+    def test_expiry_refresh_outside_grace_is_written(self):
+        stored = Session.objects.get(session_key=self.key).expire_date
+        session = SessionStore(self.key)
+        session.load()
+        with self.settings(SESSION_WRITE_GRACE=0):
+            session.save()
+        ok_(Session.objects.get(session_key=self.key).expire_date > stored)
+
+    def test_new_expiry_is_written(self):
+        session = SessionStore(self.key)
+        session.set_expiry(60)
+        session.save()
+        ok_(Session.objects.get(session_key=self.key).expire_date < timezone.now() + timedelta(seconds=61))
+
+
+class PurgeExpiredSessionsTestCase(TestCase):
+
+    def test_expired_rows_are_deleted_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        for key in range(5):
+            Session.objects.create(session_key='expired{}'.format(key), session_data='', expire_date=past)
+        SessionStore().save()
+
+        eq_(purge_expired_sessions(batch_size=2), 5)
+        eq_(Session.objects.count(), 1)
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import get_resolver
+from django.utils.six import StringIO
+from nose.tools import eq_, ok_
+
+from config.warmup import warm_up
+from importtime import ImportTimer
+
+
+class TestImportTimer(SimpleTestCase):
+
+    def test_records_new_imports(self):
+        sys.modules.pop('colorsys', None)
+        timer = ImportTimer()
+        timer.install()
+        try:
+            import colorsys  # noqa
+            import os  # noqa
+        finally:
+            timer.uninstall()
+
+        ok_('colorsys' in timer.timings)
+        ok_('os' not in timer.timings)
+        self_time, cumulative = timer.timings['colorsys']
+        ok_(0 <= self_time <= cumulative)
+
+
+class TestProfileImports(SimpleTestCase):
+
+    def test_lists_modules(self):
+        out = StringIO()
+        call_command('profile_imports', limit=3, stdout=out)
+        lines = out.getvalue().splitlines()
+        eq_(len(lines), 5)
+        ok_(lines[-1].endswith(' ms'))
+
+
+class TestWarmUp(SimpleTestCase):
+
+    def test_populates_url_resolver(self):
+        warm_up()
+        ok_(get_resolver()._populated)
@@ -0,0 +1,37 @@
+"""
+Work Django and DRF otherwise leave to the first requests of a process.
+
+Called from ``wsgi.py``. With gunicorn's ``preload_app`` it runs once in the
+master and every forked worker starts warm.
+"""
+from __future__ import absolute_import
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+from rest_framework.settings import api_settings
+
+DRF_CLASS_SETTINGS = (
+    'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES',
+    'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES',
+    'DEFAULT_THROTTLE_CLASSES',
+    'DEFAULT_PAGINATION_CLASS',
+)
+
+
+def warm_up():
+    # imports every view and fills the reverse() lookup tables
+    get_resolver().reverse_dict
+
+    for name in DRF_CLASS_SETTINGS:
+        getattr(api_settings, name)
+
+    # compiled once, then kept by the cached template loader
+    for name in settings.WARM_UP_TEMPLATES:
+        get_template(name)
+
+    # nothing opened here may be inherited by forked workers
+    connections.close_all()
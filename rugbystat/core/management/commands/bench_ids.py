@@ -0,0 +1,39 @@
+from __future__ import unicode_literals
+
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from config.db.pool import close_pools
+from config.ids import uuid7
+from users.benchmark import bench_inserts
+
+GENERATORS = (
+    ('uuid4', uuid.uuid4),
+    ('uuid7', uuid7),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compares bulk inserts of users with random and time-ordered primary keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Users to insert per generator')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = [(name, bench_inserts(make_id, options['rows'], options['batch_size']))
+                       for name, make_id in GENERATORS]
+        finally:
+            close_pools()
+            teardown_databases(old_config, verbosity=0)
+
+        for name, result in results:
+            self.stdout.write('{}: {rows} rows, {rate:.0f} rows/s'.format(name, **result))
+            for index, size in sorted(result['indexes'].items()):
+                self.stdout.write('  {:<50}{:>10.0f} kB'.format(index, size / 1024.0))
+        if not results[0][1]['indexes']:
+            self.stdout.write('Index sizes are only reported on Postgres')
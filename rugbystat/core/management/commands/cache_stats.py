@@ -0,0 +1,31 @@
+from __future__ import division, unicode_literals
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Prints the hit ratio and stored bytes per key prefix of a config.cache.backends.RedisCache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default', help='Cache to report on')
+        parser.add_argument('--reset', action='store_true', help='Start counting from zero afterwards')
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not getattr(cache, 'stats_key', None):
+            raise CommandError('The {} cache does not count hits per prefix'.format(options['alias']))
+
+        stats = cache.get_stats()
+        self.stdout.write('{:<24}{:>10}{:>10}{:>8}{:>10}{:>12}{:>8}'.format(
+            'prefix', 'hits', 'misses', 'ratio', 'sets', 'bytes/set', 'packed'))
+        for prefix, counts in sorted(stats.items()):
+            lookups = counts['hits'] + counts['misses']
+            self.stdout.write('{:<24}{:>10}{:>10}{:>8}{:>10}{:>12}{:>8}'.format(
+                prefix, counts['hits'], counts['misses'],
+                '{:.0%}'.format(counts['hits'] / lookups) if lookups else '-',
+                counts['sets'],
+                '{:.0f}'.format(counts['bytes'] / counts['sets']) if counts['sets'] else '-',
+                '{:.0%}'.format(counts['bytes'] / counts['raw_bytes']) if counts['raw_bytes'] else '-'))
+        if options['reset']:
+            cache.reset_stats()
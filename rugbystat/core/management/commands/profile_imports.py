@@ -0,0 +1,41 @@
+from __future__ import unicode_literals
+
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.common import BASE_DIR
+
+SCRIPT = os.path.join(BASE_DIR, 'importtime.py')
+
+
+class Command(BaseCommand):
+    help = 'Lists the modules that take longest to import when a process starts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', default='setup', choices=('setup', 'wsgi'),
+                            help='setup: settings and apps, as paid by every command; wsgi: the web app')
+        parser.add_argument('--sort', default='cumulative', choices=('cumulative', 'self'))
+        parser.add_argument('--limit', type=int, default=25)
+
+    def handle(self, *args, **options):
+        # a fresh interpreter, this one has imported everything already. It
+        # inherits DJANGO_CONFIGURATION, which --configuration sets.
+        process = subprocess.Popen([sys.executable, SCRIPT, options['target']], cwd=BASE_DIR,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError(err.decode('utf-8', 'replace'))
+
+        rows = [json.loads(line) for line in out.decode('utf-8').splitlines() if line.startswith('{')]
+        total = next(row['cumulative'] for row in rows if row['module'] is None)
+        rows = sorted((row for row in rows if row['module'] is not None), key=lambda row: -row[options['sort']])
+
+        self.stdout.write('{:<50} {:>9} {:>11}'.format('module', 'self ms', 'cumul. ms'))
+        for row in rows[:options['limit']]:
+            self.stdout.write('{:<50} {:>9.1f} {:>11.1f}'.format(row['module'], row['self'] * 1000,
+                                                                 row['cumulative'] * 1000))
+        self.stdout.write('{} modules imported in {:.1f} ms'.format(len(rows), total * 1000))
@@ -0,0 +1,87 @@
+"""
+Times every import made while a target is loaded in a fresh interpreter.
+
+Run as ``python importtime.py <target>`` from the project directory,
+usually through the ``profile_imports`` management command. The target is
+``setup`` (settings and ``django.setup()``, what every management command
+pays) or ``wsgi`` (the web application). One JSON object per imported module
+is written to stdout with its self and cumulative time in seconds.
+"""
+from __future__ import absolute_import, print_function
+
+import importlib
+import json
+import os
+import sys
+import time
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+
+class ImportTimer(object):
+
+    def __init__(self):
+        self.timings = {}
+        self._stack = []
+        self._import = builtins.__import__
+        self._import_module = importlib.import_module
+
+    def install(self):
+        builtins.__import__ = self.timed(self._import)
+        # Django and django-configurations load apps and settings through
+        # import_module, which skips __import__ on Python 3
+        importlib.import_module = self.timed(self._import_module)
+
+    def uninstall(self):
+        builtins.__import__ = self._import
+        importlib.import_module = self._import_module
+
+    def timed(self, func):
+        def wrapper(name, *args, **kwargs):
+            if name in sys.modules:
+                return func(name, *args, **kwargs)
+            self._stack.append(0.0)
+            started = time.time()
+            try:
+                return func(name, *args, **kwargs)
+            finally:
+                elapsed = time.time() - started
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                if name in sys.modules and name not in self.timings:
+                    self.timings[name] = (elapsed - children, elapsed)
+        return wrapper
+
+
+def load(target):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config')
+    os.environ.setdefault('DJANGO_CONFIGURATION', 'Local')
+    if target == 'wsgi':
+        importlib.import_module('wsgi')
+    else:
+        import configurations
+        configurations.setup()
+
+
+def main(argv):
+    target = argv[1] if len(argv) > 1 else 'setup'
+    timer = ImportTimer()
+    timer.install()
+    started = time.time()
+    try:
+        load(target)
+    finally:
+        timer.uninstall()
+    total = time.time() - started
+
+    for name, (self_time, cumulative) in timer.timings.items():
+        print(json.dumps({'module': name, 'self': self_time, 'cumulative': cumulative}))
+    print(json.dumps({'module': None, 'self': 0.0, 'cumulative': total}))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MediaConfig(AppConfig):
+    name = 'media'
+
+    def ready(self):
+        from .renditions import connect_signals
+        connect_signals()
@@ -0,0 +1,123 @@
+from __future__ import unicode_literals
+
+import hashlib
+import os
+
+from django.core.cache import caches
+from django.utils.encoding import force_bytes
+
+from config.instrumentation import record_cache
+from versatileimagefield.registry import versatileimagefield_registry
+from versatileimagefield.settings import VERSATILEIMAGEFIELD_CACHE_LENGTH, VERSATILEIMAGEFIELD_SIZED_DIRNAME
+from versatileimagefield.utils import get_resized_filename, get_url_from_image_key
+
+
+def parse_size_key(size_key):
+    """
+    Splits a size key like ``'crop__400x400'`` into ``('crop', 400, 400)``.
+
+    Returns ``None`` for keys that are not a plain size of the original
+    image (``'url'``, filtered renditions).
+    """
+    parts = size_key.split('__')
+    if len(parts) != 2 or parts[0] not in versatileimagefield_registry._sizedimage_registry:
+        return None
+    width, height = [int(value) for value in parts[1].split('x')]
+    return parts[0], width, height
+
+
+class RenditionIndex(object):
+    """
+    Maps storage paths of generated renditions to their URLs in the cache,
+    so resolving a thumbnail needs neither a HEAD request nor a url() call
+    on remote storage.
+    """
+    prefix = 'renditions:index:'
+
+    def __init__(self, alias='default', timeout=VERSATILEIMAGEFIELD_CACHE_LENGTH):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, path):
+        return self.prefix + hashlib.md5(force_bytes(path)).hexdigest()
+
+    def get_many(self, paths):
+        """
+        Returns ``{path: url}`` for the paths found in the index.
+        """
+        keys = dict((self.make_key(path), path) for path in paths)
+        found = self.cache.get_many(list(keys))
+        record_cache(hits=len(found), misses=len(keys) - len(found))
+        return dict((keys[key], url) for key, url in found.items())
+
+    def add_many(self, urls):
+        self.cache.set_many(dict((self.make_key(path), url) for path, url in urls.items()), self.timeout)
+
+    def add(self, path, url):
+        self.add_many({path: url})
+
+    def discard(self, paths):
+        self.cache.delete_many([self.make_key(path) for path in paths])
+
+
+rendition_index = RenditionIndex()
+
+
+def sized_path(path_to_image, sizer, width, height):
+    """
+    Storage path of a sized rendition, as versatileimagefield's
+    get_resized_path() builds it but without asking storage for the URL.
+    """
+    containing_folder, filename = os.path.split(path_to_image)
+    resized_filename = get_resized_filename(filename, width, height, sizer.get_filename_key())
+    return os.path.join(VERSATILEIMAGEFIELD_SIZED_DIRNAME, containing_folder, resized_filename).replace(' ', '')
+
+
+def rendition_urls(field_file, size_set):
+    """
+    Returns ``{name: url}`` for a rendition key set of ``field_file``.
+
+    Sized renditions are looked up in the index with one cache round-trip;
+    on a miss storage is asked and the answer is indexed. Renditions that
+    don't exist yet resolve to the URL of the source image.
+    """
+    registry = versatileimagefield_registry._sizedimage_registry
+    urls, wanted = {}, {}
+    for name, size_key in size_set:
+        parsed = parse_size_key(size_key)
+        if parsed is None:
+            urls[name] = get_url_from_image_key(field_file, size_key)
+            continue
+        sizer_name, width, height = parsed
+        sizer = registry[sizer_name](path_to_image=field_file.name, storage=field_file.storage,
+                                     create_on_demand=False, ppoi=field_file.ppoi)
+        wanted[name] = sized_path(field_file.name, sizer, width, height)
+
+    indexed = rendition_index.get_many(wanted.values())
+    found = {}
+    for name, path in wanted.items():
+        if path in indexed:
+            urls[name] = indexed[path]
+        elif field_file.storage.exists(path):
+            urls[name] = found[path] = field_file.storage.url(path)
+        else:
+            urls[name] = field_file.url
+    if found:
+        rendition_index.add_many(found)
+    return urls
+
+
+def walk_storage(storage, path):
+    """
+    Yields every file below ``path`` using one listdir() per directory.
+    """
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield '/'.join((path, name)) if path else name
+    for name in directories:
+        for found in walk_storage(storage, '/'.join((path, name)) if path else name):
+            yield found
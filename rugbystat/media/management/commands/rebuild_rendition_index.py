@@ -0,0 +1,28 @@
+from __future__ import unicode_literals
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from versatileimagefield.settings import VERSATILEIMAGEFIELD_SIZED_DIRNAME
+
+from media.index import rendition_index, walk_storage
+
+
+class Command(BaseCommand):
+    help = 'Fills the rendition index from a listing of the sized images in storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Index entries written per cache round-trip')
+
+    def handle(self, *args, **options):
+        batch, total = {}, 0
+        for path in walk_storage(default_storage, VERSATILEIMAGEFIELD_SIZED_DIRNAME):
+            batch[path] = default_storage.url(path)
+            if len(batch) >= options['batch_size']:
+                rendition_index.add_many(batch)
+                total += len(batch)
+                batch = {}
+        if batch:
+            rendition_index.add_many(batch)
+            total += len(batch)
+        self.stdout.write('Indexed {} renditions'.format(total))
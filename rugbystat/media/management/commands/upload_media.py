@@ -0,0 +1,46 @@
+from __future__ import unicode_literals
+
+import os
+
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand, CommandError
+
+from media.uploader import MB, BulkUploader
+
+
+class Command(BaseCommand):
+    help = 'Uploads a directory tree to the file storage with a pool of threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('root', help='Directory to upload')
+        parser.add_argument('--prefix', default='', help='Path on storage to upload to')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--chunk-size', type=int, default=8,
+                            help='Files above this many MB are uploaded in parts of this size')
+        parser.add_argument('--manifest', default=None,
+                            help='Resume file, <root>/.upload-manifest by default')
+        parser.add_argument('--storage', default=None,
+                            help='Dotted path of the storage class, DEFAULT_FILE_STORAGE by default')
+
+    def handle(self, *args, **options):
+        root = options['root']
+        if not os.path.isdir(root):
+            raise CommandError('{} is not a directory'.format(root))
+
+        storage_class = get_storage_class(options['storage'])
+        uploader = BulkUploader(
+            storage_factory=storage_class,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'] * MB,
+            manifest=options['manifest'] or os.path.join(root, '.upload-manifest'),
+            prefix=options['prefix'],
+        )
+        stats = uploader.run(root, progress=self.progress)
+        self.stdout.write('')
+        self.stdout.write('{files} uploaded, {skipped} already done, {failed} failed'.format(**stats))
+        self.stdout.write('{bytes} bytes in {seconds:.1f}s: {files_per_second:.1f} files/s, '
+                          '{mb_per_second:.2f} MB/s'.format(**stats))
+
+    def progress(self, stats, total):
+        self.stdout.write('\r{}/{}'.format(stats['files'] + stats['failed'], total), ending='')
+        self.stdout.flush()
@@ -0,0 +1,64 @@
+from __future__ import unicode_literals
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.jobs import JobGroup, enqueue_many
+from media.renditions import rendition_stats, warm_renditions
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Generates missing image renditions of the fields in MEDIA_RENDITION_FIELDS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('labels', nargs='*', metavar='app_label.Model.field',
+                            help='Fields to warm up, all configured fields by default')
+        parser.add_argument('--sync', action='store_true',
+                            help='Generate in this process instead of enqueueing rq jobs')
+        parser.add_argument('--stats', action='store_true',
+                            help='Only print worker counters and queue depth')
+        parser.add_argument('--group', metavar='ID',
+                            help='Only print the progress of an earlier run')
+        parser.add_argument('--retries', type=int, default=2,
+                            help='Times a failed job is retried')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for name, value in sorted(rendition_stats().items()):
+                self.stdout.write('{}: {}'.format(name, value))
+            return
+        if options['group']:
+            for name, value in sorted(JobGroup(options['group']).status().items()):
+                self.stdout.write('{}: {}'.format(name, value))
+            return
+
+        group = None if options['sync'] else JobGroup()
+        labels = options['labels'] or sorted(settings.MEDIA_RENDITION_FIELDS)
+        for label in labels:
+            if label not in settings.MEDIA_RENDITION_FIELDS:
+                raise CommandError('{} is not in MEDIA_RENDITION_FIELDS'.format(label))
+
+            model_label, field_name = label.rsplit('.', 1)
+            queryset = apps.get_model(model_label)._default_manager.exclude(**{field_name: ''})
+            count, batch = 0, []
+            for pk in queryset.values_list('pk', flat=True).iterator():
+                if options['sync']:
+                    warm_renditions(label, pk)
+                else:
+                    batch.append((warm_renditions, (label, pk), {}))
+                    if len(batch) == BATCH_SIZE:
+                        self.enqueue(batch, group, options['retries'])
+                        batch = []
+                count += 1
+            if batch:
+                self.enqueue(batch, group, options['retries'])
+            self.stdout.write('{}: {} {}'.format(label, count, 'processed' if options['sync'] else 'enqueued'))
+
+        if group is not None:
+            self.stdout.write('Follow progress with --group {}'.format(group.id))
+
+    def enqueue(self, calls, group, retries):
+        enqueue_many(calls, queue=settings.MEDIA_RENDITION_QUEUE, group=group, retries=retries)
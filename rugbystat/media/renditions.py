@@ -0,0 +1,155 @@
+from __future__ import unicode_literals
+
+import logging
+
+import django_rq
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from rq import get_current_job
+from versatileimagefield.registry import versatileimagefield_registry
+from versatileimagefield.settings import VERSATILEIMAGEFIELD_CACHE_LENGTH, cache as versatileimagefield_cache
+from versatileimagefield.utils import get_rendition_key_set
+
+from .index import parse_size_key, rendition_index, sized_path
+
+logger = logging.getLogger(__name__)
+
+STATS_PREFIX = 'renditions:stats:'
+STATS_COUNTERS = ('generated', 'skipped', 'failed')
+
+
+def generate_renditions(storage, path_to_image, size_keys, ppoi=(0.5, 0.5), progress=None):
+    """
+    Creates every missing size of one source image.
+
+    The source is read and decoded once, then each size is cut from a copy
+    of the decoded image. Sizes found in the rendition index or in storage
+    are skipped. Returns a dict with the number of generated and skipped
+    sizes.
+    """
+    registry = versatileimagefield_registry._sizedimage_registry
+    stats = {'generated': 0, 'skipped': 0}
+
+    sizes = []
+    for size_key in size_keys:
+        parsed = parse_size_key(size_key)
+        if parsed is None:
+            continue
+        sizer_name, width, height = parsed
+        sizer = registry[sizer_name](path_to_image=path_to_image, storage=storage,
+                                     create_on_demand=False, ppoi=ppoi)
+        sizes.append((sizer, sized_path(path_to_image, sizer, width, height), width, height))
+
+    indexed = rendition_index.get_many([path for sizer, path, width, height in sizes])
+    found, pending = {}, []
+    for sizer, path, width, height in sizes:
+        if path in indexed:
+            stats['skipped'] += 1
+        elif storage.exists(path):
+            stats['skipped'] += 1
+            found[path] = storage.url(path)
+        else:
+            pending.append((sizer, path, width, height))
+
+    if pending:
+        image, file_ext, image_format, mime_type = pending[0][0].retrieve_image(path_to_image)
+        image, save_kwargs = pending[0][0].preprocess(image, image_format)
+        image.load()
+
+        for done, (sizer, path, width, height) in enumerate(pending, 1):
+            # some sizers (thumbnail) resize in place
+            imagefile = sizer.process_image(image=image.copy(), image_format=image_format,
+                                            save_kwargs=save_kwargs, width=width, height=height)
+            sizer.save_image(imagefile, path, file_ext, mime_type)
+            found[path] = url = storage.url(path)
+            # lets versatileimagefield know the file exists without asking storage
+            versatileimagefield_cache.set(url, 1, VERSATILEIMAGEFIELD_CACHE_LENGTH)
+            stats['generated'] += 1
+            if progress is not None:
+                progress(done, len(pending))
+
+    if found:
+        rendition_index.add_many(found)
+    return stats
+
+
+def get_field_size_keys(label):
+    key_set = settings.MEDIA_RENDITION_FIELDS[label]
+    return [size_key for name, size_key in get_rendition_key_set(key_set)]
+
+
+def warm_renditions(label, pk):
+    """
+    rq job: generates the renditions of ``label`` ('app_label.Model.field')
+    for the object with primary key ``pk``.
+    """
+    model_label, field_name = label.rsplit('.', 1)
+    model = apps.get_model(model_label)
+    try:
+        instance = model._default_manager.get(pk=pk)
+    except model.DoesNotExist:
+        return None
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return None
+
+    job = get_current_job()
+
+    def progress(done, total):
+        if job is not None:
+            job.meta['progress'] = {'done': done, 'total': total}
+            job.save_meta()
+
+    try:
+        stats = generate_renditions(field_file.storage, field_file.name, get_field_size_keys(label),
+                                    ppoi=field_file.ppoi, progress=progress)
+    except Exception:
+        incr_stat('failed')
+        logger.exception('Could not generate renditions of %s %s', label, pk)
+        raise
+    for name, count in stats.items():
+        incr_stat(name, count)
+    return stats
+
+
+def enqueue_renditions(label, pk):
+    return django_rq.get_queue(settings.MEDIA_RENDITION_QUEUE).enqueue(warm_renditions, label, pk)
+
+
+def enqueue_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for label in settings.MEDIA_RENDITION_FIELDS:
+        model_label, field_name = label.rsplit('.', 1)
+        if apps.get_model(model_label) is sender and getattr(instance, field_name):
+            # wait for the commit so the worker can see the row
+            transaction.on_commit(lambda label=label: enqueue_renditions(label, instance.pk))
+
+
+def connect_signals():
+    for model_label in set(label.rsplit('.', 1)[0] for label in settings.MEDIA_RENDITION_FIELDS):
+        post_save.connect(enqueue_on_save, sender=apps.get_model(model_label),
+                          dispatch_uid='media.renditions.{}'.format(model_label))
+
+
+def incr_stat(name, delta=1):
+    cache = versatileimagefield_cache
+    key = STATS_PREFIX + name
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+
+def rendition_stats():
+    """
+    Counters of the rendition workers plus the depth of their queue.
+    """
+    cache = versatileimagefield_cache
+    stats = dict((name, cache.get(STATS_PREFIX + name, 0)) for name in STATS_COUNTERS)
+    stats['queued'] = django_rq.get_queue(settings.MEDIA_RENDITION_QUEUE).count
+    return stats
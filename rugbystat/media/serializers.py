@@ -0,0 +1,22 @@
+from versatileimagefield.serializers import VersatileImageFieldSerializer
+
+from .index import rendition_urls
+
+
+class IndexedImageFieldSerializer(VersatileImageFieldSerializer):
+    """
+    ``VersatileImageFieldSerializer`` that resolves renditions through the
+    rendition index, so serializing an image costs one cache round-trip
+    instead of a storage request per size. Use it for the fields listed in
+    ``MEDIA_RENDITION_FIELDS``.
+    """
+
+    def to_native(self, value):
+        if not value:
+            # placeholder images are not indexed
+            return super(IndexedImageFieldSerializer, self).to_native(value)
+        urls = rendition_urls(value, self.sizes)
+        request = self.context.get('request') if self.context else None
+        if request is not None:
+            urls = dict((name, request.build_absolute_uri(url)) for name, url in urls.items())
+        return urls
@@ -0,0 +1,12 @@
+from boto.s3.connection import OrdinaryCallingFormat
+from storages.backends.s3boto import S3BotoStorage
+
+
+class S3Storage(S3BotoStorage):
+    """
+    S3 storage with path-style bucket URLs.
+
+    Set here instead of through AWS_S3_CALLING_FORMAT so that settings don't
+    import boto: it is loaded the first time a file is stored or served.
+    """
+    calling_format = OrdinaryCallingFormat()
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase
+from mock import Mock, patch
+from nose.tools import eq_
+from rest_framework.serializers import Serializer
+
+from ..index import rendition_index, rendition_urls, walk_storage
+from ..serializers import IndexedImageFieldSerializer
+
+SIZE_SET = [('full', 'url'), ('small', 'crop__40x30')]
+SMALL_PATH = '__sized__/photos/match-crop-c0-5__0-5-40x30-70.jpg'
+
+
+class TestRenditionUrls(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location, base_url='/media/')
+        self.storage.save('photos/match.jpg', ContentFile(b'jpeg'))
+        self.field_file = Mock(storage=self.storage, ppoi=(0.5, 0.5), url='/media/photos/match.jpg')
+        self.field_file.name = 'photos/match.jpg'
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_indexed_rendition_skips_storage(self):
+        rendition_index.add(SMALL_PATH, '/cdn/small.jpg')
+
+        with patch.object(self.storage, 'exists') as exists:
+            urls = rendition_urls(self.field_file, SIZE_SET)
+        eq_(exists.called, False)
+        eq_(urls['small'], '/cdn/small.jpg')
+
+    def test_miss_falls_back_to_storage_and_is_indexed(self):
+        self.storage.save(SMALL_PATH, ContentFile(b'jpeg'))
+
+        eq_(rendition_urls(self.field_file, SIZE_SET)['small'], '/media/' + SMALL_PATH)
+        eq_(rendition_index.get_many([SMALL_PATH]), {SMALL_PATH: '/media/' + SMALL_PATH})
+
+    def test_missing_rendition_resolves_to_source(self):
+        eq_(rendition_urls(self.field_file, SIZE_SET)['small'], '/media/photos/match.jpg')
+        eq_(rendition_index.get_many([SMALL_PATH]), {})
+
+    def test_serializer_field_reads_the_index(self):
+        rendition_index.add(SMALL_PATH, '/cdn/small.jpg')
+        field = IndexedImageFieldSerializer(sizes=SIZE_SET)
+        field.bind('photo', Serializer(context={'request': RequestFactory().get('/')}))
+
+        with patch.object(self.storage, 'exists') as exists:
+            urls = field.to_representation(self.field_file)
+        eq_(exists.called, False)
+        eq_(urls, {'full': 'http://testserver/media/photos/match.jpg', 'small': 'http://testserver/cdn/small.jpg'})
+
+    def test_walk_storage(self):
+        self.storage.save(SMALL_PATH, ContentFile(b'jpeg'))
+        eq_(sorted(walk_storage(self.storage, '__sized__')), [SMALL_PATH])
+        eq_(sorted(walk_storage(self.storage, '')), sorted([SMALL_PATH, 'photos/match.jpg']))
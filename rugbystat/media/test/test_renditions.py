@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+from mock import patch
+from nose.tools import eq_
+from PIL import Image
+from versatileimagefield.datastructures.base import ProcessedImage
+
+from ..index import parse_size_key
+from ..renditions import generate_renditions
+
+SIZE_KEYS = ['url', 'crop__40x30', 'thumbnail__20x20', 'filters__invert__url']
+
+
+class TestGenerateRenditions(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location, base_url='/media/')
+        source = BytesIO()
+        Image.new('RGB', (120, 80), 'red').save(source, 'JPEG')
+        self.path = self.storage.save('photos/match.jpg', ContentFile(source.getvalue()))
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_parse_size_key(self):
+        eq_(parse_size_key('crop__40x30'), ('crop', 40, 30))
+        eq_(parse_size_key('url'), None)
+        eq_(parse_size_key('filters__invert__crop__40x30'), None)
+
+    def test_source_is_decoded_once(self):
+        with patch.object(ProcessedImage, 'retrieve_image', autospec=True,
+                          side_effect=ProcessedImage.retrieve_image) as retrieve:
+            stats = generate_renditions(self.storage, self.path, SIZE_KEYS)
+        eq_(retrieve.call_count, 1)
+        eq_(stats, {'generated': 2, 'skipped': 0})
+
+        crop = Image.open(self.storage.open('__sized__/photos/match-crop-c0-5__0-5-40x30-70.jpg'))
+        eq_(crop.size, (40, 30))
+
+    def test_existing_sizes_are_skipped(self):
+        generate_renditions(self.storage, self.path, SIZE_KEYS)
+        cache.clear()
+        progress = []
+
+        with patch.object(ProcessedImage, 'retrieve_image') as retrieve:
+            stats = generate_renditions(self.storage, self.path, SIZE_KEYS,
+                                        progress=lambda done, total: progress.append(done))
+        eq_(retrieve.called, False)
+        eq_(stats, {'generated': 0, 'skipped': 2})
+        eq_(progress, [])
+
+    def test_indexed_sizes_skip_storage(self):
+        generate_renditions(self.storage, self.path, SIZE_KEYS)
+
+        with patch.object(self.storage, 'exists') as exists:
+            stats = generate_renditions(self.storage, self.path, SIZE_KEYS)
+        eq_(exists.called, False)
+        eq_(stats, {'generated': 0, 'skipped': 2})
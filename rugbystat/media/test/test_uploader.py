@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+from mock import MagicMock, Mock
+from nose.tools import eq_, ok_
+
+from ..uploader import BulkUploader, multipart_upload
+
+
+class TestBulkUploader(SimpleTestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.target = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.source, '.upload-manifest')
+        for name in ('1961/final.jpg', '1961/programme.pdf', '1975/semi/final.jpg'):
+            self.write(name, b'x' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.source)
+        shutil.rmtree(self.target)
+
+    def write(self, name, content):
+        path = os.path.join(self.source, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fp:
+            fp.write(content)
+
+    def uploader(self):
+        return BulkUploader(lambda: FileSystemStorage(location=self.target), workers=3,
+                            manifest=self.manifest, prefix='archive')
+
+    def test_uploads_tree(self):
+        stats = self.uploader().run(self.source)
+
+        eq_((stats['files'], stats['bytes'], stats['failed']), (3, 300, 0))
+        ok_(os.path.exists(os.path.join(self.target, 'archive/1975/semi/final.jpg')))
+        ok_(not os.path.exists(os.path.join(self.target, 'archive/.upload-manifest')))
+
+    def test_resumes_from_manifest(self):
+        self.uploader().run(self.source)
+        self.write('1961/final.jpg', b'y' * 50)
+        os.utime(os.path.join(self.source, '1961/final.jpg'), (0, 0))
+
+        stats = self.uploader().run(self.source)
+        eq_((stats['files'], stats['skipped']), (1, 2))
+        eq_(sorted(os.listdir(os.path.join(self.target, 'archive/1961'))), ['final.jpg', 'programme.pdf'])
+        with open(os.path.join(self.target, 'archive/1961/final.jpg'), 'rb') as fp:
+            eq_(fp.read(), b'y' * 50)
+
+    def test_replaces_file_left_by_interrupted_run(self):
+        os.makedirs(os.path.join(self.target, 'archive/1961'))
+        with open(os.path.join(self.target, 'archive/1961/final.jpg'), 'wb') as fp:
+            fp.write(b'x' * 10)
+
+        stats = self.uploader().run(self.source)
+        eq_((stats['files'], stats['failed']), (3, 0))
+        eq_(sorted(os.listdir(os.path.join(self.target, 'archive/1961'))), ['final.jpg', 'programme.pdf'])
+        with open(os.path.join(self.target, 'archive/1961/final.jpg'), 'rb') as fp:
+            eq_(fp.read(), b'x' * 100)
+
+    def test_renamed_save_is_a_failure(self):
+        storage = Mock(exists=Mock(return_value=False), save=Mock(side_effect=lambda name, content: name + '_1'))
+        stats = BulkUploader(lambda: storage, workers=2, manifest=self.manifest).run(self.source)
+        eq_((stats['files'], stats['failed']), (0, 3))
+
+    def test_failures_are_counted_and_retried(self):
+        storage = Mock(save=Mock(side_effect=IOError))
+        stats = BulkUploader(lambda: storage, workers=2, manifest=self.manifest).run(self.source)
+        eq_((stats['files'], stats['failed']), (0, 3))
+
+        stats = self.uploader().run(self.source)
+        eq_(stats['files'], 3)
+
+
+class TestMultipartUpload(SimpleTestCase):
+
+    def test_uploads_in_parts(self):
+        storage = MagicMock(default_acl='public-read', headers={})
+        storage._clean_name.side_effect = lambda name: name
+        storage._normalize_name.side_effect = lambda name: name
+        upload = storage.bucket.initiate_multipart_upload.return_value
+
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b'x' * 25)
+            multipart_upload(storage, 'scans/1961.pdf', fp, 25, 10)
+
+        eq_([call[0][1] for call in upload.upload_part_from_file.call_args_list], [1, 2, 3])
+        eq_(upload.upload_part_from_file.call_args_list[-1][1], {'size': 5})
+        ok_(upload.complete_upload.called)
@@ -0,0 +1,157 @@
+from __future__ import division, unicode_literals
+
+import io
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.core.files import File
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def multipart_upload(storage, name, fp, size, chunk_size):
+    """
+    Uploads ``fp`` to an S3BotoStorage in parts of ``chunk_size`` bytes.
+    """
+    key_name = storage._normalize_name(storage._clean_name(name))
+    headers = dict(getattr(storage, 'headers', None) or {})
+    headers['Content-Type'] = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    upload = storage.bucket.initiate_multipart_upload(key_name, headers=headers, policy=storage.default_acl)
+    try:
+        for part, offset in enumerate(range(0, size, chunk_size), 1):
+            fp.seek(offset)
+            upload.upload_part_from_file(fp, part, size=min(chunk_size, size - offset))
+        upload.complete_upload()
+    except Exception:
+        upload.cancel_upload()
+        raise
+    return name
+
+
+def supports_multipart(storage):
+    return hasattr(storage, '_normalize_name') and \
+        hasattr(getattr(storage, 'bucket', None), 'initiate_multipart_upload')
+
+
+class Manifest(object):
+    """
+    Append-only record of uploaded files, one JSON object per line, so an
+    interrupted run can resume where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            with io.open(path, encoding='utf-8') as manifest:
+                for line in manifest:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['path']] = (entry['size'], entry['mtime'])
+
+    def is_done(self, path, size, mtime):
+        return self.entries.get(path) == (size, mtime)
+
+    def add(self, path, size, mtime):
+        with self.lock:
+            self.entries[path] = (size, mtime)
+            if self.path:
+                with io.open(self.path, 'a', encoding='utf-8') as manifest:
+                    manifest.write('{}\n'.format(json.dumps({'path': path, 'size': size, 'mtime': mtime})))
+
+
+class BulkUploader(object):
+    """
+    Uploads a directory tree to a storage backend from a bounded pool of
+    threads. Every thread keeps its own storage instance, and with it its
+    connection, for all of the files it uploads.
+    """
+
+    def __init__(self, storage_factory, workers=8, chunk_size=8 * MB, manifest=None, prefix=''):
+        self.storage_factory = storage_factory
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.manifest = Manifest(manifest)
+        self.prefix = prefix
+        self.local = threading.local()
+
+    @property
+    def storage(self):
+        if not hasattr(self.local, 'storage'):
+            self.local.storage = self.storage_factory()
+        return self.local.storage
+
+    def collect(self, root):
+        manifest = os.path.abspath(self.manifest.path) if self.manifest.path else None
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                full_path = os.path.join(dirpath, filename)
+                if os.path.abspath(full_path) == manifest:
+                    continue
+                stat = os.stat(full_path)
+                yield os.path.relpath(full_path, root).replace(os.sep, '/'), full_path, stat.st_size, int(stat.st_mtime)
+
+    def upload(self, item):
+        path, full_path, size, mtime = item
+        name = '/'.join(part for part in (self.prefix.strip('/'), path) if part)
+        storage = self.storage
+        try:
+            with open(full_path, 'rb') as fp:
+                if size > self.chunk_size and supports_multipart(storage):
+                    multipart_upload(storage, name, fp, size, self.chunk_size)
+                else:
+                    if storage.exists(name):
+                        # changed since the last run, or half-written by a run
+                        # that was interrupted; storages that don't overwrite
+                        # would save it next to the stale copy
+                        storage.delete(name)
+                    saved = storage.save(name, File(fp))
+                    if saved != name:
+                        raise IOError('{} was stored as {}'.format(name, saved))
+        except Exception:
+            logger.exception('Could not upload %s', full_path)
+            return item, False
+        self.manifest.add(path, size, mtime)
+        return item, True
+
+    def run(self, root, progress=None):
+        """
+        Uploads everything below ``root`` that isn't in the manifest yet and
+        returns counters with the achieved throughput.
+        """
+        stats = {'files': 0, 'bytes': 0, 'skipped': 0, 'failed': 0}
+        todo = []
+        for item in self.collect(root):
+            if self.manifest.is_done(item[0], item[2], item[3]):
+                stats['skipped'] += 1
+            else:
+                todo.append(item)
+
+        started = time.time()
+        pool = ThreadPool(self.workers)
+        try:
+            for item, ok in pool.imap_unordered(self.upload, todo):
+                if ok:
+                    stats['files'] += 1
+                    stats['bytes'] += item[2]
+                else:
+                    stats['failed'] += 1
+                if progress is not None:
+                    progress(stats, len(todo))
+        finally:
+            pool.close()
+            pool.join()
+
+        stats['seconds'] = max(time.time() - started, 1e-6)
+        stats['files_per_second'] = stats['files'] / stats['seconds']
+        stats['mb_per_second'] = stats['bytes'] / MB / stats['seconds']
+        return stats
@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from .models import Appearance, Match, Player, Team
+
+
+class AppearanceInline(admin.TabularInline):
+    model = Appearance
+    raw_id_fields = ('player',)
+    extra = 0
+
+
+@admin.register(Match)
+class MatchAdmin(admin.ModelAdmin):
+    list_display = ('date', 'home', 'home_score', 'away_score', 'away', 'aggregated')
+    list_filter = ('season', 'aggregated')
+    date_hierarchy = 'date'
+    raw_id_fields = ('home', 'away')
+    inlines = (AppearanceInline,)
+
+
+@admin.register(Player)
+class PlayerAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+
+
+@admin.register(Team)
+class TeamAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
@@ -0,0 +1,185 @@
+"""
+Incremental maintenance of the aggregate tables.
+
+Matches and appearances carry an ``aggregated`` flag. ``aggregate_pending``
+locks the rows that are not counted yet, sums their contribution per
+aggregate row in memory and applies the sums as ``F()`` increments in one
+transaction, so a job that is retried or runs next to another one never
+counts a row twice. Updates of counted matches are not reflected, corrected
+results need ``manage.py rebuild_stats``.
+"""
+from __future__ import unicode_literals
+
+import multiprocessing
+from collections import Counter, defaultdict
+
+import django_rq
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+
+from .models import Appearance, HeadToHead, Match, PlayerAppearances, TeamSeasonRecord
+
+
+def match_deltas(rows, deltas=None):
+    """
+    Adds the increments caused by ``(season, home_id, away_id, home_score,
+    away_score)`` rows to ``deltas``, a mapping of ``(model label, lookup)``
+    to a ``Counter`` of field increments.
+    """
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    for season, home_id, away_id, home_score, away_score in rows:
+        for team_id, opponent_id, scored, conceded in ((home_id, away_id, home_score, away_score),
+                                                       (away_id, home_id, away_score, home_score)):
+            if scored > conceded:
+                result = 'won'
+            elif scored < conceded:
+                result = 'lost'
+            else:
+                result = 'drawn'
+            increments = {'played': 1, result: 1, 'points_for': scored, 'points_against': conceded}
+            deltas[TeamSeasonRecord._meta.label, (('season', season), ('team_id', team_id))].update(increments)
+            deltas[HeadToHead._meta.label, (('opponent_id', opponent_id), ('team_id', team_id))].update(increments)
+    return deltas
+
+
+def appearance_deltas(rows, deltas=None):
+    """
+    Same as ``match_deltas`` for ``(player_id, team_id, season)`` rows.
+    """
+    if deltas is None:
+        deltas = defaultdict(Counter)
+    for player_id, team_id, season in rows:
+        lookup = (('player_id', player_id), ('season', season), ('team_id', team_id))
+        deltas[PlayerAppearances._meta.label, lookup]['appearances'] += 1
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Increments the aggregate rows, creating the missing ones.
+
+    Rows are written in a fixed order so that concurrent jobs touching the
+    same rows wait for each other instead of deadlocking.
+    """
+    for (label, lookup), increments in sorted(deltas.items()):
+        model = apps.get_model(label)
+        lookup = dict(lookup)
+        updates = dict((field, F(field) + value) for field, value in increments.items())
+        if model.objects.filter(**lookup).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**dict(lookup, **increments))
+        except IntegrityError:
+            # another job created the row after our update found nothing
+            model.objects.filter(**lookup).update(**updates)
+
+
+def aggregate_pending(match_ids=None, id_range=None):
+    """
+    rq job: counts the matches and appearances that are not in the aggregate
+    tables yet, optionally only those of the matches in ``match_ids`` or
+    with an id in the half-open ``id_range``. Returns the number of counted
+    matches and appearances.
+    """
+    match_filter, appearance_filter = {'aggregated': False}, {'aggregated': False}
+    if match_ids is not None:
+        match_filter['pk__in'] = appearance_filter['match_id__in'] = list(match_ids)
+    if id_range is not None:
+        match_filter['pk__gte'] = appearance_filter['match_id__gte'] = id_range[0]
+        match_filter['pk__lt'] = appearance_filter['match_id__lt'] = id_range[1]
+
+    with transaction.atomic():
+        matches = list(Match.objects.select_for_update().filter(**match_filter).order_by().values_list(
+            'pk', 'season', 'home_id', 'away_id', 'home_score', 'away_score'))
+        appearances = list(Appearance.objects.select_for_update().filter(**appearance_filter).values_list(
+            'pk', 'player_id', 'team_id', 'match__season'))
+
+        deltas = match_deltas(row[1:] for row in matches)
+        appearance_deltas((row[1:] for row in appearances), deltas)
+        apply_deltas(deltas)
+
+        # flag exactly the rows we locked, not whatever the filter matches now
+        Match.objects.filter(pk__in=[row[0] for row in matches]).update(aggregated=True)
+        Appearance.objects.filter(pk__in=[row[0] for row in appearances]).update(aggregated=True)
+    return {'matches': len(matches), 'appearances': len(appearances)}
+
+
+def enqueue_aggregation(match_ids):
+    """
+    Counts the matches with ``match_ids`` in a worker. Loaders that insert
+    with ``bulk_create`` (which sends no signals) call this once per batch.
+    """
+    return django_rq.get_queue(settings.STATS_QUEUE).enqueue(aggregate_pending, list(match_ids))
+
+
+def enqueue_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    match_id = instance.pk if sender is Match else instance.match_id
+    # wait for the commit so the worker can see the row
+    transaction.on_commit(lambda: enqueue_aggregation([match_id]))
+
+
+def reset():
+    """
+    Empties the aggregate tables and marks every match and appearance as
+    not counted.
+    """
+    with transaction.atomic():
+        for model in (TeamSeasonRecord, HeadToHead, PlayerAppearances):
+            model.objects.all().delete()
+        Match.objects.filter(aggregated=True).update(aggregated=False)
+        Appearance.objects.filter(aggregated=True).update(aggregated=False)
+
+
+def id_ranges(chunk_size):
+    """
+    Half-open match id ranges of ``chunk_size`` ids covering every match.
+    """
+    ids = Match.objects.order_by('pk').values_list('pk', flat=True)
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return []
+    return [(start, min(start + chunk_size, last + 1)) for start in range(first, last + 1, chunk_size)]
+
+
+def _aggregate_range(id_range):
+    return aggregate_pending(id_range=id_range)
+
+
+def rebuild(processes=None, chunk_size=None, progress=None):
+    """
+    Recomputes the aggregate tables from scratch, counting chunks of
+    matches in a process pool. ``progress`` is called with the counts of
+    every finished chunk. Returns the total counts.
+    """
+    if processes is None:
+        processes = settings.STATS_REBUILD_PROCESSES
+    if chunk_size is None:
+        chunk_size = settings.STATS_CHUNK_SIZE
+
+    reset()
+    ranges = id_ranges(chunk_size)
+    totals = Counter()
+    if processes <= 1 or len(ranges) <= 1:
+        results = (_aggregate_range(id_range) for id_range in ranges)
+        pool = None
+    else:
+        # forked children must not share the parent's connections
+        connections.close_all()
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(_aggregate_range, ranges)
+    try:
+        for counts in results:
+            totals.update(counts)
+            if progress is not None:
+                progress(counts)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {'matches': totals['matches'], 'appearances': totals['appearances']}
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_save
+
+
+class StatsConfig(AppConfig):
+    name = 'stats'
+    verbose_name = 'Statistics'
+
+    def ready(self):
+        from .aggregation import enqueue_on_save
+        from .models import Appearance, Match
+        post_save.connect(enqueue_on_save, sender=Match, dispatch_uid='stats.aggregation.match')
+        post_save.connect(enqueue_on_save, sender=Appearance, dispatch_uid='stats.aggregation.appearance')
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk loading of historical match results.
+
+Source files are CSV (or semicolon/tab separated text) with a header naming
+``date``, ``home``, ``away`` and either ``score`` ("24:9") or ``home_score``
+and ``away_score``, plus an optional ``season``. Rows are streamed from the
+file, normalised with cached team and date lookups and written in batches.
+On Postgres a batch is copied into a temporary table with ``COPY`` and
+inserted from there, skipping matches that are already stored.
+"""
+from __future__ import division, unicode_literals
+
+import codecs
+import csv
+import datetime
+import itertools
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import six
+
+from .aggregation import enqueue_aggregation
+from .models import Match, Team
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+# dd.mm.yy, read as 19yy: strptime's %y would put 00-68 in this century
+SHORT_DATE_RE = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{2})$')
+SCORE_RE = re.compile(r'^(\d+)\s*[:\-]\s*(\d+)$')
+DELIMITERS = ',;\t'
+COLUMNS = ('date', 'season', 'home_id', 'away_id', 'home_score', 'away_score')
+# invalid rows kept in the report of a file, the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+CREATE_TABLE = '''
+CREATE TEMPORARY TABLE stats_match_import (
+    date date, season smallint, home_id integer, away_id integer,
+    home_score smallint, away_score smallint
+) ON COMMIT DROP
+'''
+COPY = 'COPY stats_match_import ({}) FROM STDIN WITH (FORMAT csv)'.format(', '.join(COLUMNS))
+INSERT = '''
+INSERT INTO stats_match ({columns}, aggregated)
+SELECT {columns}, false FROM stats_match_import
+ON CONFLICT DO NOTHING
+RETURNING id
+'''.format(columns=', '.join(COLUMNS))
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def clean_team_name(name):
+    return ' '.join(name.strip().strip('"\'«»“”').split())
+
+
+def parse_date(value):
+    match = SHORT_DATE_RE.match(value)
+    if match is not None:
+        day, month, year = (int(group) for group in match.groups())
+        try:
+            return datetime.date(1900 + year, month, day)
+        except ValueError:
+            pass
+    else:
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+    raise InvalidRow("Unknown date format '{}'".format(value))
+
+
+class Normalizer(object):
+    """
+    Turns source rows into ``COLUMNS`` tuples.
+
+    Teams are loaded once and looked up by case-insensitive name, teams
+    that are not known yet are created. Parsed dates are memoised since an
+    archive repeats the same few match days on many rows.
+    """
+
+    def __init__(self):
+        self._teams = None
+        self._dates = {}
+
+    def team_id(self, name):
+        if self._teams is None:
+            self._teams = dict((team_name.lower(), pk) for pk, team_name in Team.objects.values_list('pk', 'name'))
+        name = clean_team_name(name)
+        if not name:
+            raise InvalidRow('Missing team')
+        key = name.lower()
+        if key not in self._teams:
+            self._teams[key] = Team.objects.get_or_create(name=name)[0].pk
+        return self._teams[key]
+
+    def date(self, value):
+        value = value.strip()
+        if value not in self._dates:
+            self._dates[value] = parse_date(value)
+        return self._dates[value]
+
+    def score(self, row):
+        if row.get('score'):
+            match = SCORE_RE.match(row['score'].strip())
+            if match is None:
+                raise InvalidRow("Invalid score '{}'".format(row['score']))
+            return int(match.group(1)), int(match.group(2))
+        try:
+            return int(row['home_score']), int(row['away_score'])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidRow('Missing score')
+
+    def __call__(self, row):
+        date = self.date(row.get('date') or '')
+        try:
+            season = int(row['season']) if row.get('season') else date.year
+        except ValueError:
+            raise InvalidRow("Invalid season '{}'".format(row['season']))
+        home_id, away_id = self.team_id(row.get('home') or ''), self.team_id(row.get('away') or '')
+        if home_id == away_id:
+            raise InvalidRow('A team cannot play itself')
+        home_score, away_score = self.score(row)
+        return (date, season, home_id, away_id, home_score, away_score)
+
+
+def read_rows(fileobj, encoding='utf-8-sig'):
+    """
+    Yields ``(line number, row dict)`` pairs of a delimited file opened in
+    binary mode, guessing the delimiter from the header.
+    """
+    lines = codecs.iterdecode(fileobj, encoding)
+    header = next(lines, '')
+    delimiter = max(DELIMITERS, key=header.count)
+    lines = itertools.chain([header], lines)
+    if six.PY2:
+        reader = csv.reader((line.encode('utf-8') for line in lines), delimiter=str(delimiter))
+        reader = ([cell.decode('utf-8') for cell in cells] for cells in reader)
+    else:
+        reader = csv.reader(lines, delimiter=delimiter)
+
+    names = [name.strip().lower() for name in next(reader, [])]
+    for number, cells in enumerate(reader, 2):
+        if any(cell.strip() for cell in cells):
+            yield number, dict(zip(names, cells))
+
+
+def normalize(rows, normalizer, report):
+    """
+    Yields the normalised rows, counting the rows read and the invalid ones
+    in ``report``.
+    """
+    for number, row in rows:
+        report['rows'] += 1
+        try:
+            yield normalizer(row)
+        except InvalidRow as e:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append((number, six.text_type(e)))
+
+
+class RowFile(object):
+    """
+    Read-only file over rows, rendered as CSV on demand for ``copy_expert``.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.buffer += (','.join(six.text_type(value) for value in row) + '\n').encode('utf-8')
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def copy_batch(rows):
+    """
+    Copies rows in and returns the ids of the matches that were new.
+    """
+    with connection.cursor() as cursor:
+        # left over when the import runs inside an outer transaction
+        cursor.execute('DROP TABLE IF EXISTS stats_match_import')
+        cursor.execute(CREATE_TABLE)
+        cursor.copy_expert(COPY, RowFile(rows))
+        cursor.execute(INSERT)
+        return [pk for pk, in cursor.fetchall()]
+
+
+def insert_batch(rows):
+    """
+    ``copy_batch`` for databases without ``COPY``, used in development.
+    """
+    rows = list(rows)
+    existing = Match.objects.filter(date__in=set(row[0] for row in rows)).values_list('date', 'home_id', 'away_id')
+    seen, matches = set(existing), []
+    for row in rows:
+        key = (row[0], row[2], row[3])
+        if key not in seen:
+            seen.add(key)
+            matches.append(Match(**dict(zip(COLUMNS, row))))
+    Match.objects.bulk_create(matches)
+    created = set((match.date, match.home_id, match.away_id) for match in matches)
+    return [pk for pk, date, home_id, away_id in Match.objects.filter(
+        date__in=set(key[0] for key in created)).values_list('pk', 'date', 'home_id', 'away_id')
+        if (date, home_id, away_id) in created]
+
+
+def load_batch(rows):
+    if connection.vendor == 'postgresql':
+        return copy_batch(rows)
+    return insert_batch(rows)
+
+
+def import_file(fileobj, name, batch_size=None, aggregate=True):
+    """
+    Imports the results in ``fileobj``, one transaction per ``batch_size``
+    rows, and returns a report with counts and throughput. The new matches
+    are counted in the statistics tables by rq jobs unless ``aggregate`` is
+    false.
+    """
+    if batch_size is None:
+        batch_size = settings.STATS_IMPORT_BATCH_SIZE
+
+    report = {'file': name, 'rows': 0, 'inserted': 0, 'invalid': 0, 'errors': []}
+    started = time.time()
+    rows = normalize(read_rows(fileobj), Normalizer(), report)
+    while True:
+        with transaction.atomic():
+            before = report['rows'] - report['invalid']
+            # the generator is consumed inside the transaction, so an error
+            # while reading rolls back the batch
+            ids = load_batch(itertools.islice(rows, batch_size))
+        report['inserted'] += len(ids)
+        if ids and aggregate:
+            enqueue_aggregation(ids)
+        if report['rows'] - report['invalid'] - before < batch_size:
+            break
+
+    report['duplicates'] = report['rows'] - report['invalid'] - report['inserted']
+    report['seconds'] = time.time() - started
+    report['rate'] = report['rows'] / report['seconds'] if report['seconds'] else 0.0
+    logger.info('Imported %(file)s: %(inserted)s of %(rows)s rows in %(seconds).1fs', report)
+    return report
+
+
+def import_stored_file(name, batch_size=None):
+    """
+    rq job: imports a file from the default storage and deletes it.
+    """
+    with default_storage.open(name, 'rb') as fileobj:
+        report = import_file(fileobj, name, batch_size)
+    default_storage.delete(name)
+    return report
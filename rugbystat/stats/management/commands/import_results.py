@@ -0,0 +1,66 @@
+from __future__ import unicode_literals
+
+import io
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from config.jobs import JobGroup, enqueue_many
+from stats.importer import import_file, import_stored_file
+
+
+class Command(BaseCommand):
+    help = 'Loads match results from CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', metavar='path', help='Files to import')
+        parser.add_argument('--batch-size', type=int, default=settings.STATS_IMPORT_BATCH_SIZE,
+                            help='Rows per transaction')
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Upload the files to the file storage and import them in rq jobs')
+        parser.add_argument('--group', metavar='ID',
+                            help='Only print the progress of an earlier --enqueue run')
+        parser.add_argument('--retries', type=int, default=2,
+                            help='Times a failed job is retried')
+
+    def handle(self, *args, **options):
+        if options['group']:
+            for name, value in sorted(JobGroup(options['group']).status().items()):
+                self.stdout.write('{}: {}'.format(name, value))
+            return
+
+        for path in options['paths']:
+            if not os.path.isfile(path):
+                raise CommandError('{} is not a file'.format(path))
+        if options['enqueue']:
+            return self.enqueue(options['paths'], options['batch_size'], options['retries'])
+
+        totals = {'rows': 0, 'inserted': 0, 'seconds': 0.0}
+        for path in options['paths']:
+            with io.open(path, 'rb') as fileobj:
+                report = import_file(fileobj, path, options['batch_size'])
+            self.stdout.write('{file}: {rows} rows, {inserted} new, {duplicates} duplicates, {invalid} invalid '
+                              'in {seconds:.1f}s ({rate:.0f} rows/s)'.format(**report))
+            if options['verbosity'] > 1:
+                for number, error in report['errors']:
+                    self.stdout.write('  line {}: {}'.format(number, error))
+            for name in totals:
+                totals[name] += report[name]
+        if len(options['paths']) > 1 and totals['seconds']:
+            self.stdout.write('Total: {rows} rows, {inserted} new in {seconds:.1f}s ({rate:.0f} rows/s)'.format(
+                rate=totals['rows'] / totals['seconds'], **totals))
+
+    def enqueue(self, paths, batch_size, retries):
+        calls = []
+        for path in paths:
+            with io.open(path, 'rb') as fileobj:
+                name = default_storage.save(os.path.join(settings.STATS_IMPORT_PREFIX, os.path.basename(path)),
+                                            File(fileobj))
+            calls.append((import_stored_file, (name, batch_size), {}))
+        group = JobGroup()
+        enqueue_many(calls, queue=settings.STATS_IMPORT_QUEUE, group=group, retries=retries,
+                     timeout=settings.STATS_IMPORT_TIMEOUT)
+        self.stdout.write('{} files enqueued, follow progress with --group {}'.format(len(calls), group.id))
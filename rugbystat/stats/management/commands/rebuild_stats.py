@@ -0,0 +1,24 @@
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from stats.aggregation import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the statistics tables from the match results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.STATS_REBUILD_PROCESSES,
+                            help='Chunks counted in parallel')
+        parser.add_argument('--chunk-size', type=int, default=settings.STATS_CHUNK_SIZE,
+                            help='Match ids per chunk')
+
+    def handle(self, *args, **options):
+        def progress(counts):
+            if options['verbosity'] > 1:
+                self.stdout.write('{matches} matches, {appearances} appearances'.format(**counts))
+
+        totals = rebuild(options['processes'], options['chunk_size'], progress)
+        self.stdout.write('Counted {matches} matches and {appearances} appearances'.format(**totals))
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.28 on 2026-10-18 10:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Appearance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aggregated', models.BooleanField(db_index=True, default=False, editable=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('won', models.PositiveIntegerField(default=0)),
+                ('drawn', models.PositiveIntegerField(default=0)),
+                ('lost', models.PositiveIntegerField(default=0)),
+                ('points_for', models.PositiveIntegerField(default=0)),
+                ('points_against', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'head to head records',
+            },
+        ),
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('season', models.PositiveSmallIntegerField(db_index=True)),
+                ('home_score', models.PositiveSmallIntegerField()),
+                ('away_score', models.PositiveSmallIntegerField()),
+                ('aggregated', models.BooleanField(db_index=True, default=False, editable=False)),
+            ],
+            options={
+                'ordering': ('-date',),
+                'verbose_name_plural': 'matches',
+            },
+        ),
+        migrations.CreateModel(
+            name='Player',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('born', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerAppearances',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.PositiveSmallIntegerField()),
+                ('appearances', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appearance_counts', to='stats.Player')),
+            ],
+            options={
+                'ordering': ('season', '-appearances'),
+                'verbose_name_plural': 'player appearances',
+            },
+        ),
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamSeasonRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('won', models.PositiveIntegerField(default=0)),
+                ('drawn', models.PositiveIntegerField(default=0)),
+                ('lost', models.PositiveIntegerField(default=0)),
+                ('points_for', models.PositiveIntegerField(default=0)),
+                ('points_against', models.PositiveIntegerField(default=0)),
+                ('season', models.PositiveSmallIntegerField()),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='season_records', to='stats.Team')),
+            ],
+            options={
+                'ordering': ('season', '-won'),
+            },
+        ),
+        migrations.AddField(
+            model_name='playerappearances',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stats.Team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='away',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='away_matches', to='stats.Team'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='home',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='home_matches', to='stats.Team'),
+        ),
+        migrations.AddField(
+            model_name='headtohead',
+            name='opponent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stats.Team'),
+        ),
+        migrations.AddField(
+            model_name='headtohead',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to='stats.Team'),
+        ),
+        migrations.AddField(
+            model_name='appearance',
+            name='match',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appearances', to='stats.Match'),
+        ),
+        migrations.AddField(
+            model_name='appearance',
+            name='player',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appearances', to='stats.Player'),
+        ),
+        migrations.AddField(
+            model_name='appearance',
+            name='team',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stats.Team'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='teamseasonrecord',
+            unique_together=set([('team', 'season')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='playerappearances',
+            unique_together=set([('player', 'team', 'season')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='match',
+            unique_together=set([('date', 'home', 'away')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='headtohead',
+            unique_together=set([('team', 'opponent')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='appearance',
+            unique_together=set([('match', 'player')]),
+        ),
+    ]
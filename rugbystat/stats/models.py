@@ -0,0 +1,109 @@
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+@python_2_unicode_compatible
+class Team(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+@python_2_unicode_compatible
+class Player(models.Model):
+    name = models.CharField(max_length=100)
+    born = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+@python_2_unicode_compatible
+class Match(models.Model):
+    date = models.DateField()
+    season = models.PositiveSmallIntegerField(db_index=True)
+    home = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='home_matches')
+    away = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='away_matches')
+    home_score = models.PositiveSmallIntegerField()
+    away_score = models.PositiveSmallIntegerField()
+    # set once the match is counted in the aggregate tables
+    aggregated = models.BooleanField(default=False, editable=False, db_index=True)
+
+    class Meta:
+        ordering = ('-date',)
+        unique_together = ('date', 'home', 'away')
+        verbose_name_plural = 'matches'
+
+    def __str__(self):
+        return '{} {} {}:{} {}'.format(self.date, self.home, self.home_score, self.away_score, self.away)
+
+
+@python_2_unicode_compatible
+class Appearance(models.Model):
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='appearances')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='appearances')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    aggregated = models.BooleanField(default=False, editable=False, db_index=True)
+
+    class Meta:
+        unique_together = ('match', 'player')
+
+    def __str__(self):
+        return '{} ({})'.format(self.player, self.match)
+
+
+# Aggregate tables, kept up to date by stats.aggregation. Counters are only
+# ever incremented, the rebuild_stats command recomputes them from scratch.
+
+class Record(models.Model):
+    played = models.PositiveIntegerField(default=0)
+    won = models.PositiveIntegerField(default=0)
+    drawn = models.PositiveIntegerField(default=0)
+    lost = models.PositiveIntegerField(default=0)
+    points_for = models.PositiveIntegerField(default=0)
+    points_against = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class TeamSeasonRecord(Record):
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='season_records')
+    season = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ('season', '-won')
+        unique_together = ('team', 'season')
+
+
+class HeadToHead(Record):
+    """
+    Record of ``team`` against ``opponent``, stored for both orders of a pair.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='head_to_head')
+    opponent = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('team', 'opponent')
+        verbose_name_plural = 'head to head records'
+
+
+class PlayerAppearances(models.Model):
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='appearance_counts')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    season = models.PositiveSmallIntegerField()
+    appearances = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('season', '-appearances')
+        unique_together = ('player', 'team', 'season')
+        verbose_name_plural = 'player appearances'
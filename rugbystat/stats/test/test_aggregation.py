@@ -0,0 +1,104 @@
+import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+from mock import call, patch
+from nose.tools import eq_
+
+from ..aggregation import aggregate_pending, id_ranges, rebuild
+from ..models import Appearance, HeadToHead, Match, Player, PlayerAppearances, Team, TeamSeasonRecord
+
+
+def record(model, **lookup):
+    row = model.objects.get(**lookup)
+    return (row.played, row.won, row.drawn, row.lost, row.points_for, row.points_against)
+
+
+class TestAggregation(TestCase):
+
+    def setUp(self):
+        self.vva, self.slava, self.fili = [Team.objects.create(name=name) for name in ('VVA', 'Slava', 'Fili')]
+        self.player = Player.objects.create(name='Tikhonov')
+
+    def add_match(self, date, home, away, home_score, away_score):
+        return Match.objects.create(date=date, season=date.year, home=home, away=away,
+                                    home_score=home_score, away_score=away_score)
+
+    def add_results(self):
+        first = self.add_match(datetime.date(1985, 5, 1), self.vva, self.slava, 24, 9)
+        self.add_match(datetime.date(1985, 6, 1), self.slava, self.vva, 12, 12)
+        self.add_match(datetime.date(1986, 5, 1), self.fili, self.vva, 15, 3)
+        Appearance.objects.create(match=first, player=self.player, team=self.vva)
+
+    def snapshot(self):
+        return [
+            sorted(TeamSeasonRecord.objects.values_list('team__name', 'season', 'played', 'won', 'drawn', 'lost',
+                                                        'points_for', 'points_against')),
+            sorted(HeadToHead.objects.values_list('team__name', 'opponent__name', 'played', 'won', 'drawn', 'lost',
+                                                  'points_for', 'points_against')),
+            sorted(PlayerAppearances.objects.values_list('player__name', 'team__name', 'season', 'appearances')),
+        ]
+
+    def test_pending_results_are_counted(self):
+        self.add_results()
+
+        eq_(aggregate_pending(), {'matches': 3, 'appearances': 1})
+        eq_(record(TeamSeasonRecord, team=self.vva, season=1985), (2, 1, 1, 0, 36, 21))
+        eq_(record(TeamSeasonRecord, team=self.vva, season=1986), (1, 0, 0, 1, 3, 15))
+        eq_(record(HeadToHead, team=self.slava, opponent=self.vva), (2, 0, 1, 1, 21, 36))
+        eq_(record(HeadToHead, team=self.vva, opponent=self.slava), (2, 1, 1, 0, 36, 21))
+        eq_(PlayerAppearances.objects.get(player=self.player, team=self.vva, season=1985).appearances, 1)
+
+    def test_counted_results_are_not_counted_again(self):
+        self.add_results()
+        aggregate_pending()
+        before = self.snapshot()
+
+        eq_(aggregate_pending(), {'matches': 0, 'appearances': 0})
+        eq_(self.snapshot(), before)
+
+    def test_new_results_increment_existing_rows(self):
+        self.add_results()
+        aggregate_pending()
+        match = self.add_match(datetime.date(1986, 7, 1), self.vva, self.fili, 20, 0)
+
+        with self.assertNumQueries(9):
+            eq_(aggregate_pending([match.pk]), {'matches': 1, 'appearances': 0})
+        eq_(record(TeamSeasonRecord, team=self.vva, season=1986), (2, 1, 0, 1, 23, 15))
+        eq_(record(HeadToHead, team=self.fili, opponent=self.vva), (2, 1, 0, 1, 15, 23))
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.add_results()
+        aggregate_pending()
+        incremental = self.snapshot()
+        TeamSeasonRecord.objects.update(won=0)
+
+        eq_(rebuild(processes=1, chunk_size=1), {'matches': 3, 'appearances': 1})
+        eq_(self.snapshot(), incremental)
+
+    def test_id_ranges_cover_every_match(self):
+        eq_(id_ranges(2), [])
+        self.add_results()
+        first = Match.objects.order_by('pk').first().pk
+
+        eq_(id_ranges(2), [(first, first + 2), (first + 2, first + 3)])
+
+    def test_saved_results_are_enqueued_after_commit(self):
+        with patch('stats.aggregation.transaction.on_commit') as on_commit, \
+                patch('stats.aggregation.enqueue_aggregation') as enqueue:
+            match = self.add_match(datetime.date(1985, 5, 1), self.vva, self.slava, 24, 9)
+            Appearance.objects.create(match=match, player=self.player, team=self.vva)
+            match.save()
+            for (callback,), kwargs in on_commit.call_args_list:
+                callback()
+
+        eq_(on_commit.call_count, 2)
+        eq_(enqueue.call_args_list, [call([match.pk]), call([match.pk])])
+
+    def test_rebuild_command(self):
+        self.add_results()
+        out = StringIO()
+
+        call_command('rebuild_stats', processes=1, stdout=out)
+        eq_(out.getvalue().strip(), 'Counted 3 matches and 1 appearances')
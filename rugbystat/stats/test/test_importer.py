@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+from mock import patch
+from nose.tools import eq_, ok_
+
+from ..importer import Normalizer, RowFile, import_file, read_rows
+from ..models import Match, Team
+
+RESULTS = '''﻿Date;Home;Away;Score
+01.05.1985;«Слава»;ВВА;9:24
+01.05.1985;Slava;VVA;12-12
+1985-06-01;  вва ;Fili;20:0
+31.02.1985;VVA;Fili;3:0
+
+01.05.1985;Слава;ВВА;9:24
+'''
+
+
+class TestImporter(TestCase):
+
+    def setUp(self):
+        self.vva = Team.objects.create(name='ВВА')
+
+    def import_results(self, data=RESULTS, **kwargs):
+        with patch('stats.importer.enqueue_aggregation') as enqueue:
+            report = import_file(BytesIO(data.encode('utf-8')), 'results.csv', **kwargs)
+        return report, enqueue
+
+    def test_read_rows_guesses_delimiter(self):
+        rows = list(read_rows(BytesIO('date,home,away\n1985-05-01,"VVA, Monino",Fili\n'.encode('utf-8'))))
+        eq_(rows, [(2, {'date': '1985-05-01', 'home': 'VVA, Monino', 'away': 'Fili'})])
+
+    def test_normalizer_caches_lookups(self):
+        normalizer = Normalizer()
+        normalizer({'date': '01.05.1985', 'home': 'вва', 'away': '"Slava"', 'score': '3:0'})
+
+        with self.assertNumQueries(0):
+            row = normalizer({'date': '01.05.1985', 'home': 'Slava', 'away': 'ВВА',
+                              'home_score': '10', 'away_score': '7', 'season': '1984'})
+        eq_(row, (datetime.date(1985, 5, 1), 1984, Team.objects.get(name='Slava').pk, self.vva.pk, 10, 7))
+
+    def test_two_digit_years_are_last_century(self):
+        report, enqueue = self.import_results('date;home;away;score\n12.05.36;Слава;ВВА;3:0\n31.02.36;Слава;ВВА;3:0\n')
+
+        eq_(report['errors'], [(3, "Unknown date format '31.02.36'")])
+        match = Match.objects.get()
+        eq_((match.date, match.season), (datetime.date(1936, 5, 12), 1936))
+
+    def test_row_file_renders_csv(self):
+        rows = [(datetime.date(1985, 5, 1), 1985, 1, 2, 24, 9), (datetime.date(1985, 6, 1), 1985, 2, 1, 0, 3)]
+        fileobj = RowFile(rows)
+
+        eq_(fileobj.read(10) + fileobj.read(), b'1985-05-01,1985,1,2,24,9\n1985-06-01,1985,2,1,0,3\n')
+        eq_(fileobj.read(), b'')
+
+    def test_import_skips_duplicates_and_invalid_rows(self):
+        report, enqueue = self.import_results(batch_size=2)
+
+        eq_([report[name] for name in ('rows', 'inserted', 'duplicates', 'invalid')], [5, 3, 1, 1])
+        eq_(report['errors'], [(5, "Unknown date format '31.02.1985'")])
+        eq_(sorted(Team.objects.values_list('name', flat=True)), ['Fili', 'Slava', 'VVA', 'ВВА', 'Слава'])
+        eq_(Match.objects.get(date=datetime.date(1985, 6, 1)).home, self.vva)
+        eq_(sorted(pk for (ids,), kwargs in enqueue.call_args_list for pk in ids),
+            sorted(Match.objects.values_list('pk', flat=True)))
+
+    def test_reimport_adds_nothing(self):
+        self.import_results()
+        report, enqueue = self.import_results()
+
+        eq_(report['inserted'], 0)
+        eq_(report['duplicates'], 4)
+        eq_(Match.objects.count(), 3)
+        eq_(enqueue.called, False)
+
+
+class TestImportCommand(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, '1985.csv')
+        with open(self.path, 'wb') as fileobj:
+            fileobj.write(RESULTS.encode('utf-8'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @patch('stats.importer.enqueue_aggregation')
+    def test_reports_throughput(self, enqueue):
+        out = StringIO()
+
+        call_command('import_results', self.path, verbosity=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        ok_(lines[0].startswith('{}: 5 rows, 3 new, 1 duplicates, 1 invalid in '.format(self.path)))
+        ok_(lines[0].endswith('rows/s)'))
+        eq_(lines[1], "  line 5: Unknown date format '31.02.1985'")
+
+    @patch('stats.management.commands.import_results.enqueue_many')
+    @patch('stats.management.commands.import_results.JobGroup')
+    @patch('stats.management.commands.import_results.default_storage')
+    def test_enqueue_uploads_files(self, storage, group, enqueue_many):
+        storage.save.return_value = 'imports/1985.csv'
+        out = StringIO()
+
+        call_command('import_results', self.path, enqueue=True, stdout=out)
+        eq_(storage.save.call_args[0][0], 'imports/1985.csv')
+        (calls,), kwargs = enqueue_many.call_args
+        eq_([args for func, args, kw in calls], [('imports/1985.csv', 50000)])
+        eq_(kwargs['queue'], 'bulk')
+        eq_(Match.objects.count(), 0)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+class UsersConfig(AppConfig):
+    name = 'users'
+
+    def ready(self):
+        from .cache import invalidate_on_change
+        from .models import User
+        post_save.connect(invalidate_on_change, sender=User, dispatch_uid='users.cache')
+        post_delete.connect(invalidate_on_change, sender=User, dispatch_uid='users.cache')
@@ -0,0 +1,220 @@
+"""
+In-process load test of the users API.
+
+Scenarios drive the API through APIClient from a number of threads and
+report latency percentiles, requests per second and SQL queries per
+request (taken from the Server-Timing header set by
+config.instrumentation). Results can be stored as a baseline and later
+runs compared against it.
+
+``bench_inserts`` measures bulk inserts of users with a given primary key
+generator, and the size of the indexes they leave behind.
+"""
+from __future__ import division, unicode_literals
+
+import itertools
+import json
+import math
+import re
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .models import User
+
+PASSWORD = 'Match-day-1961'
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+INDEX_SIZES = """
+SELECT pg_class.relname, pg_relation_size(pg_class.oid)
+FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+WHERE pg_index.indrelid IN (%s::regclass, %s::regclass)
+"""
+
+
+def seed_users(count):
+    """
+    Creates ``count`` users and their tokens sharing one password, hashed
+    once.
+    """
+    password = make_password(PASSWORD)
+    users = [User(username='bench{}'.format(n), email='bench{}@example.com'.format(n), password=password)
+             for n in range(count)]
+    tokens = [Token(user=user) for user in users]
+    for token in tokens:
+        token.key = token.generate_key()
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        Token.objects.bulk_create(tokens)
+    return users
+
+
+class Scenario(object):
+    """
+    A named request against the API, run many times.
+    """
+
+    def __init__(self, name, users):
+        self.name = name
+        self.users = users
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def next_index(self):
+        with self.lock:
+            return next(self.counter)
+
+    def request(self, client):
+        index = self.next_index()
+        user = self.users[index % len(self.users)]
+        if self.name == 'token-auth':
+            return client.post(reverse('api-token-auth'), {'username': user.username, 'password': PASSWORD})
+        if self.name == 'create':
+            return client.post(reverse('user-list'), {'username': 'bench{}-{}'.format(id(self), index),
+                                                      'password': PASSWORD})
+
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(user.auth_token.key))
+        url = reverse('user-detail', kwargs={'pk': user.pk})
+        if self.name == 'retrieve':
+            return client.get(url)
+        if self.name == 'update':
+            return client.patch(url, {'first_name': 'Name{}'.format(index)})
+        raise ValueError('Unknown scenario {}'.format(self.name))
+
+
+SCENARIOS = ('token-auth', 'create', 'retrieve', 'update')
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = int(math.ceil(percent / 100 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def run_scenario(scenario, requests, concurrency):
+    samples = []
+    samples_lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(count):
+        client = APIClient()
+        local = []
+        try:
+            for i in range(count):
+                started = time.time()
+                try:
+                    response = scenario.request(client)
+                except Exception:
+                    local.append((time.time() - started, 0, 500))
+                    continue
+                latency = time.time() - started
+                match = QUERIES_RE.search(response.get('Server-Timing', ''))
+                local.append((latency, int(match.group(1)) if match else 0, response.status_code))
+        finally:
+            with samples_lock:
+                samples.extend(local)
+            if concurrency > 1:
+                connection.close()
+
+    started = time.time()
+    if concurrency == 1:
+        worker(requests)
+    else:
+        threads = [threading.Thread(target=worker, args=(count,)) for count in per_thread]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.time() - started
+
+    latencies = [sample[0] for sample in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[2] >= 400),
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'rps': len(samples) / elapsed,
+        'queries': sum(sample[1] for sample in samples) / max(len(samples), 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a list of regressions: failed requests, p95 latency more than
+    ``threshold`` (a fraction) over the baseline, or more queries per
+    request.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if result['errors']:
+            regressions.append('{}: {} failed requests'.format(name, result['errors']))
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p95'] > base['p95'] * (1 + threshold):
+            regressions.append('{}: p95 {:.1f}ms, baseline {:.1f}ms'.format(name, result['p95'], base['p95']))
+        if result['queries'] > base['queries'] + 0.01:
+            regressions.append('{}: {:.2f} queries/request, baseline {:.2f}'.format(
+                name, result['queries'], base['queries']))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+
+
+def index_sizes():
+    """
+    Sizes in bytes of the indexes on the user and token tables, by index
+    name. Empty unless the database is Postgres.
+    """
+    if connection.vendor != 'postgresql':
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(INDEX_SIZES, [User._meta.db_table, Token._meta.db_table])
+        return dict(cursor.fetchall())
+
+
+def bench_inserts(make_id, rows, batch_size):
+    """
+    Empties the user table and bulk-inserts ``rows`` users and their tokens,
+    with primary keys from ``make_id``. Returns the insert rate and the
+    resulting index sizes.
+    """
+    if connection.vendor == 'postgresql':
+        # unlike DELETE, also gives back the index pages of earlier runs
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE {} CASCADE'.format(connection.ops.quote_name(User._meta.db_table)))
+    else:
+        User.objects.all().delete()
+
+    elapsed = 0.0
+    for start in range(0, rows, batch_size):
+        users = [User(id=make_id(), username='bench{}'.format(n), password='!')
+                 for n in range(start, min(start + batch_size, rows))]
+        tokens = [Token(user=user) for user in users]
+        for token in tokens:
+            token.key = token.generate_key()
+        started = time.time()
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            Token.objects.bulk_create(tokens)
+        elapsed += time.time() - started
+    return {'rows': rows, 'rate': rows / elapsed if elapsed else 0.0, 'indexes': index_sizes()}
@@ -0,0 +1,64 @@
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from .hashing import make_passwords
+from .models import User
+
+
+def build_user(data, password_hash):
+    data = dict(data)
+    data.pop('password', None)
+    user = User(**data)
+    user.username = User.normalize_username(user.username)
+    user.email = User.objects.normalize_email(user.email)
+    user.password = password_hash
+    return user
+
+
+def bulk_create_users(rows, batch_size=None):
+    """
+    Creates users and their auth tokens with batched inserts.
+
+    ``rows`` is a list of ``(index, validated_data)`` pairs. Returns a list of
+    ``(user, token)`` pairs and a list of ``(index, errors)`` pairs for rows
+    that could not be written.
+    """
+    if batch_size is None:
+        batch_size = settings.USERS_BULK_CREATE_BATCH_SIZE
+
+    hashes = make_passwords([data.get('password') for index, data in rows])
+    pending = [(index, build_user(data, password_hash))
+               for (index, data), password_hash in zip(rows, hashes)]
+
+    created, errors = [], []
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        try:
+            created.extend(_create_chunk([user for index, user in chunk]))
+        except IntegrityError:
+            # somebody else took a username in the meantime, find out which
+            # rows are affected by writing the chunk one row at a time
+            for index, user in chunk:
+                try:
+                    created.extend(_create_chunk([user]))
+                except IntegrityError:
+                    # any other constraint failing is not the row's fault
+                    if not User.objects.filter(username=user.username).exists():
+                        raise
+                    errors.append((index, {'username': ['A user with that username already exists.']}))
+    return created, errors
+
+
+def _create_chunk(users):
+    # bulk_create does not send post_save, so tokens are issued here
+    # instead of in authentication.models.create_auth_token
+    tokens = [Token(user=user) for user in users]
+    for token in tokens:
+        token.key = token.generate_key()
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        Token.objects.bulk_create(tokens)
+    return list(zip(users, tokens))
@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from config.cache import TwoTierCache
+
+from .models import User
+
+user_response_cache = TwoTierCache(
+    prefix='user-response',
+    timeout=settings.USERS_RESPONSE_CACHE_TIMEOUT,
+    local_size=settings.USERS_RESPONSE_CACHE_LOCAL_SIZE,
+    local_timeout=settings.USERS_RESPONSE_CACHE_LOCAL_TIMEOUT,
+)
+
+# formats whose rendered detail responses are cached; the browsable API
+# renders per-visitor pages
+CACHED_FORMATS = ('json',)
+
+
+def response_generation(pk):
+    """
+    Returns the generation of ``pk``'s cached responses. Bumping it with
+    ``invalidate_user_response`` retires every cached variant of the user
+    at once, whatever fields and format they were rendered with.
+    """
+    key = 'generation:{}'.format(pk)
+    generation = user_response_cache.get(key)
+    if generation is None:
+        # started from the clock, so a generation that was evicted from
+        # the cache is not handed out again for entries still stored
+        generation = user_response_cache.add(key, int(time.time() * 1000))
+    return generation
+
+
+def response_key(pk, format, fields=None):
+    """
+    Cache key of a rendered user, or ``None`` if ``pk`` is not a valid
+    primary key. The pk is normalized so every spelling of a UUID shares an
+    entry and is invalidated with it.
+    """
+    try:
+        pk = User._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+    key = '{}:{}:{}'.format(pk, response_generation(pk), format)
+    if fields is None:
+        return key
+    return '{}:{}'.format(key, ','.join(fields))
+
+
+def invalidate_user_response(pk):
+    user_response_cache.incr('generation:{}'.format(pk))
+
+
+def invalidate_on_change(sender, instance, **kwargs):
+    invalidate_user_response(instance.pk)
+    # a request running meanwhile may still cache what it read before commit
+    transaction.on_commit(lambda: invalidate_user_response(instance.pk))
@@ -0,0 +1,13 @@
+from rest_framework import exceptions
+from rest_framework.views import exception_handler as default_exception_handler
+
+from .hashing import HashingBusy
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, answering 429 when password hashing is busy.
+    """
+    if isinstance(exc, HashingBusy):
+        exc = exceptions.Throttled(wait=exc.wait, detail=str(exc))
+    return default_exception_handler(exc, context)
@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.encoding import force_str
+
+from .models import User
+
+
+class Echo(object):
+    """
+    File-like object that hands back what is written to it, so csv.writer
+    can be used to produce single lines.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(fields, queryset=None):
+    if queryset is None:
+        queryset = User.objects.all()
+    # no ORDER BY and no model instances: the rows are streamed straight off
+    # the cursor
+    return queryset.order_by().values_list(*fields).iterator()
+
+
+def iter_ndjson(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([force_str(field) for field in fields])
+    for row in rows:
+        yield writer.writerow([force_str(value) for value in row])
+
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
+
+
+def stream_users(fields, output='ndjson', queryset=None):
+    """
+    Returns a StreamingHttpResponse with every user, one row at a time.
+    """
+    encode, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(encode(fields, iter_rows(fields, queryset)),
+                                     content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="users.{}"'.format(output)
+    return response
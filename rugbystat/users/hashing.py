@@ -0,0 +1,145 @@
+"""
+Password hashing off the request thread.
+
+Hashes run on a small pool of OS threads shared by the process. The hashers
+spend their time in C code that releases the GIL (hashlib.pbkdf2_hmac,
+argon2-cffi), so the pool keeps every core busy without pickling passwords
+to other processes, and under gevent it is gevent's own thread pool, which
+does not block the hub.
+
+The pool is bounded: when ``USERS_HASHING_WORKERS + USERS_HASHING_MAX_WAITING``
+hashes are already in flight, or a hash waited in the queue for longer than
+``USERS_HASHING_QUEUE_TIMEOUT`` seconds, ``HashingBusy`` is raised and the API
+answers 429 (see ``users.exceptions``) instead of piling up requests behind
+a match-day burst.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing pool is saturated. ``wait`` is the suggested
+    number of seconds before trying again.
+    """
+
+    def __init__(self, wait=None):
+        super(HashingBusy, self).__init__('Too many password checks in progress.')
+        self.wait = wait
+
+
+class HashingService(object):
+
+    def __init__(self, workers=None, max_waiting=None, queue_timeout=None):
+        self.workers = workers or settings.USERS_HASHING_WORKERS
+        if max_waiting is None:
+            max_waiting = settings.USERS_HASHING_MAX_WAITING
+        self.capacity = self.workers + max_waiting
+        if queue_timeout is None:
+            queue_timeout = settings.USERS_HASHING_QUEUE_TIMEOUT
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def get_pool(self):
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = self.make_pool()
+            self._pid = os.getpid()
+        return self._pool
+
+    def make_pool(self):
+        if 'gevent.monkey' in sys.modules and sys.modules['gevent.monkey'].is_module_patched('threading'):
+            from gevent.threadpool import ThreadPool
+            pool = ThreadPool(self.workers)
+            return lambda func, args: pool.spawn(func, *args)
+
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(self.workers)
+        return pool.apply_async
+
+    def run(self, func, *args):
+        return self.run_many(func, [args])[0]
+
+    def run_many(self, func, args_list):
+        """
+        Runs ``func`` once per argument tuple, all at the same time, and
+        returns the results in order.
+        """
+        with self._lock:
+            if self.in_flight + len(args_list) > self.capacity:
+                raise HashingBusy(wait=self.queue_timeout)
+            self.in_flight += len(args_list)
+        try:
+            pool, submitted = self.get_pool(), time.time()
+            results = [pool(self._call, (submitted, func, args)) for args in args_list]
+            return [result.get() for result in results]
+        finally:
+            with self._lock:
+                self.in_flight -= len(args_list)
+
+    def map(self, func, items):
+        """
+        Runs ``func`` over ``items``, no more at a time than there are
+        workers, so a batch does not starve single requests for long.
+        """
+        results = []
+        for start in range(0, len(items), self.workers):
+            results.extend(self.run_many(func, [(item,) for item in items[start:start + self.workers]]))
+        return results
+
+    def _call(self, submitted, func, args):
+        if time.time() - submitted > self.queue_timeout:
+            raise HashingBusy(wait=self.queue_timeout)
+        return func(*args)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = HashingService()
+        return _service
+
+
+def make_password(password):
+    return get_service().run(hashers.make_password, password)
+
+
+def make_passwords(passwords):
+    return get_service().map(hashers.make_password, passwords)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    Like ``django.contrib.auth.hashers.check_password``, with the hash run by
+    the service. A correct password stored with anything but the preferred
+    hasher and its current parameters is passed to ``setter`` for rehashing.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    is_correct = get_service().run(hashers.check_password, password, encoded)
+    if is_correct and setter is not None and must_update(encoded):
+        setter(password)
+    return is_correct
+
+
+def must_update(encoded):
+    preferred = hashers.get_hasher('default')
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
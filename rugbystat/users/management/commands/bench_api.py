@@ -0,0 +1,69 @@
+from __future__ import unicode_literals
+
+import logging
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+
+from config.db.pool import close_pools
+from users.benchmark import SCENARIOS, Scenario, compare, load_baseline, run_scenario, save_baseline, seed_users
+
+
+class Command(BaseCommand):
+    help = 'Load-tests the users API in-process against a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                            help='One of {}, all by default'.format(', '.join(SCENARIOS)))
+        parser.add_argument('--users', type=int, default=100, help='Users to seed')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--baseline', default='benchmarks.json',
+                            help='Baseline file to compare with (and to write with --save)')
+        parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed p95 latency growth over the baseline, as a fraction')
+
+    def handle(self, *args, **options):
+        for name in options['scenarios']:
+            if name not in SCENARIOS:
+                raise CommandError('Unknown scenario {}'.format(name))
+
+        # per-request log lines would drown the report
+        performance_logger = logging.getLogger('rugbystat.performance')
+        level = performance_logger.level
+        performance_logger.setLevel(logging.ERROR)
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # every simulated client comes from the same address
+            with override_settings(THROTTLE_RATES={}):
+                results = self.run(options)
+        finally:
+            close_pools()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            performance_logger.setLevel(level)
+
+        if options['save']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write('Baseline written to {}'.format(options['baseline']))
+        elif os.path.exists(options['baseline']):
+            regressions = compare(results, load_baseline(options['baseline']), options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against {}:\n{}'.format(options['baseline'], '\n'.join(regressions)))
+            self.stdout.write('No regressions against {}'.format(options['baseline']))
+
+    def run(self, options):
+        users = seed_users(options['users'])
+        self.stdout.write('{:<12}{:>9}{:>8}{:>10}{:>10}{:>10}{:>10}{:>9}'.format(
+            'scenario', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries'))
+        results = {}
+        for name in options['scenarios'] or SCENARIOS:
+            result = results[name] = run_scenario(Scenario(name, users), options['requests'], options['concurrency'])
+            self.stdout.write('{:<12}{requests:>9}{errors:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}'
+                              '{rps:>10.1f}{queries:>9.2f}'.format(name, **result))
+        return results
@@ -0,0 +1,46 @@
+from __future__ import print_function, unicode_literals
+
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.forms.models import model_to_dict
+from rest_framework.renderers import JSONRenderer
+
+from users.models import User
+from users.renderers import FastJSONRenderer, ujson
+from users.serializers import UserSerializer, fast_user_serializer
+
+
+class Command(BaseCommand):
+    help = 'Compares the default and the fast rendering path of the users API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10,
+                            help='Users per payload (1 compares a detail response)')
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        size, repeat = options['users'], options['repeat']
+        # payloads are built in memory so that only the serialization and
+        # rendering are measured, not the database
+        users = [User(username='user{}'.format(i), first_name='Ivan', last_name='Petrov')
+                 for i in range(size)]
+        rows = [model_to_dict(user, fields=fast_user_serializer.fields) for user in users]
+        for user, row in zip(users, rows):
+            row['id'] = user.pk
+
+        default_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        def default_path():
+            return default_renderer.render(UserSerializer(users, many=True).data)
+
+        def fast_path():
+            return fast_renderer.render(fast_user_serializer.many(rows))
+
+        self.stdout.write('{} users per payload, {} payloads, ujson {}'.format(
+            size, repeat, 'installed' if ujson else 'missing'))
+        results = {}
+        for name, path in (('default', default_path), ('fast', fast_path)):
+            results[name] = min(timeit.repeat(path, number=repeat, repeat=3))
+            self.stdout.write('{:>8}: {:8.2f} us/payload'.format(name, results[name] / repeat * 1e6))
+        self.stdout.write('speedup: {:.1f}x'.format(results['default'] / results['fast']))
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.28 on 2026-10-18 10:21
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_id_uuid7'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='key_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,15 +1,50 @@
 from __future__ import unicode_literals
 
-import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.encoding import python_2_unicode_compatible
+
+from config.ids import uuid7
+
+from . import hashing
 # from django.utils.translation import ugettext_lazy as _
 
 
 @python_2_unicode_compatible
 class User(AbstractUser):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # cheap version stamp for conditional requests, bumped on every save
+    version = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+    # part of every signed token, bumping it revokes them all
+    key_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.username
+
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            # rehash with the preferred hasher now that we know the password
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return hashing.check_password(raw_password, self.password, setter)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding:
+            self.version += 1
+        else:
+            # counted by the database, so concurrent saves of copies loaded
+            # at the same version still end up with different versions
+            self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'version', 'modified'}
+        super(User, self).save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
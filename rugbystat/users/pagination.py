@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: no COUNT(*) and no OFFSET, so deep
+    pages cost the same as the first one.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
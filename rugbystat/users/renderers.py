@@ -0,0 +1,44 @@
+from django.utils import six
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+PLAIN_TYPES = six.string_types + six.integer_types + (float, type(None))
+
+
+def is_plain(data):
+    """
+    Tells whether data is made of JSON types only. ujson would happily encode
+    other objects through their ``__dict__``, so anything else has to go
+    through the stock encoder.
+    """
+    if isinstance(data, dict):
+        return all(isinstance(key, six.string_types) and is_plain(value)
+                   for key, value in six.iteritems(data))
+    if isinstance(data, (list, tuple)):
+        return all(is_plain(value) for value in data)
+    return isinstance(data, PLAIN_TYPES)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with ujson when it is installed.
+
+    Data with non-JSON types, and indented output for the browsable API, is
+    passed to the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if ujson is None or data is None or not is_plain(data) or \
+                self.get_indent(accepted_media_type, renderer_context or {}):
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+
+        ret = ujson.dumps(data, ensure_ascii=self.ensure_ascii, escape_forward_slashes=False)
+
+        if isinstance(ret, six.text_type):
+            ret = ret.encode('utf-8')
+        # same as JSONRenderer: keep the output safe to embed in javascript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,9 +1,28 @@
+from django.db import models
+from django.utils import six
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 
+from .bulk import bulk_create_users
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin(object):
+    """
+    Leaves out the fields that are not in the ``fields`` tuple of the
+    serializer context, when there is one.
+    """
+
+    def get_field_names(self, declared_fields, info):
+        names = super(SparseFieldsMixin, self).get_field_names(declared_fields, info)
+        selected = self.context.get('fields')
+        if selected is None:
+            return names
+        return [name for name in names if name in selected]
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -11,6 +30,57 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('username', )
 
 
+class ValuesSerializer(object):
+    """
+    Turns ``values()`` rows into the output of a ModelSerializer with a fixed
+    tuple of fields, without building serializer fields per call.
+
+    The conversion for every field is looked up once, when the serializer is
+    created.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self.converters = tuple(
+            (name, self.get_converter(model._meta.get_field(name))) for name in self.fields
+        )
+        self.selections = {}
+
+    def select(self, fields):
+        """
+        Serializer for a subset of the fields, built once per subset.
+        ``None`` selects all of them.
+        """
+        if fields is None:
+            return self
+        fields = tuple(fields)
+        if fields not in self.selections:
+            self.selections[fields] = ValuesSerializer(self.model, fields)
+        return self.selections[fields]
+
+    def get_converter(self, field):
+        if isinstance(field, models.UUIDField):
+            return six.text_type
+        if isinstance(field, models.DateTimeField):
+            return serializers.DateTimeField().to_representation
+        return None
+
+    def to_representation(self, row):
+        ret = {}
+        for name, convert in self.converters:
+            value = row[name]
+            ret[name] = value if convert is None or value is None else convert(value)
+        return ret
+
+    def many(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+fast_user_serializer = ValuesSerializer(User, UserSerializer.Meta.fields)
+
+
 class CreateUserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
@@ -24,3 +94,69 @@ class CreateUserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'password', 'auth_token')
         read_only_fields = ('auth_token',)
         extra_kwargs = {'password': {'write_only': True}}
+
+
+class BulkUserRowSerializer(CreateUserSerializer):
+    """
+    A single row of a bulk import. Usernames are checked for uniqueness by
+    BulkCreateUserSerializer with one query for the whole payload.
+    """
+
+    class Meta:
+        model = User
+        fields = ('username', 'password', 'email', 'first_name', 'last_name')
+        extra_kwargs = {'password': {'write_only': True}}
+
+    def get_fields(self):
+        fields = super(BulkUserRowSerializer, self).get_fields()
+        username = fields['username']
+        username.validators = [validator for validator in username.validators
+                               if not isinstance(validator, UniqueValidator)]
+        return fields
+
+
+class BulkCreateUserSerializer(serializers.ListSerializer):
+    """
+    Validates a list of users row by row. Invalid rows are collected in
+    ``row_errors`` instead of failing the whole payload.
+    """
+    child = BulkUserRowSerializer()
+    duplicate_username = 'A user with that username already exists.'
+
+    def __init__(self, *args, **kwargs):
+        super(BulkCreateUserSerializer, self).__init__(*args, **kwargs)
+        self.row_errors = []
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of users.']
+            })
+
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors.append((index, exc.detail))
+
+        usernames = [attrs['username'] for index, attrs in rows]
+        taken = set(User.objects.filter(username__in=usernames)
+                                .values_list('username', flat=True))
+        valid = []
+        for index, attrs in rows:
+            if attrs['username'] in taken:
+                self.row_errors.append((index, {'username': [self.duplicate_username]}))
+            else:
+                taken.add(attrs['username'])
+                valid.append((index, attrs))
+        return valid
+
+    def save(self):
+        self.instance, errors = bulk_create_users(self.validated_data)
+        self.row_errors = sorted(self.row_errors + errors, key=lambda error: error[0])
+        return self.instance
+
+    def to_representation(self, data):
+        return [{'id': str(user.pk), 'username': user.username, 'auth_token': token.key}
+                for user, token in data]
@@ -1,13 +1,15 @@
-import uuid
 import factory
 
+from config.ids import uuid7
+
+
 class UserFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = 'users.User'
         django_get_or_create = ('username',)
 
-    id = factory.Sequence(lambda n: uuid.uuid4())
+    id = factory.LazyFunction(uuid7)
     username = factory.Sequence(lambda n: 'testuser{}'.format(n))
     password = factory.Faker('password', length=10, special_chars=True, digits=True, upper_case=True, lower_case=True)
     email = factory.Faker('email')
@@ -0,0 +1,28 @@
+from django.test import TestCase
+from nose.tools import eq_
+
+from ..benchmark import Scenario, compare, percentile, run_scenario, seed_users
+
+
+class TestBenchmark(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        eq_(percentile(values, 50), 50)
+        eq_(percentile(values, 95), 95)
+        eq_(percentile(values, 99), 99)
+        eq_(percentile([], 50), 0.0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'retrieve': {'p95': 10.0, 'queries': 2.0}}
+        ok = {'retrieve': {'p95': 11.0, 'queries': 2.0, 'errors': 0}}
+        slow = {'retrieve': {'p95': 13.0, 'queries': 3.0, 'errors': 1}}
+
+        eq_(compare(ok, baseline, 0.2), [])
+        eq_(len(compare(slow, baseline, 0.2)), 3)
+
+    def test_run_scenario(self):
+        users = seed_users(2)
+        for name in ('retrieve', 'update'):
+            result = run_scenario(Scenario(name, users), requests=4, concurrency=1)
+            eq_((result['requests'], result['errors']), (4, 0))
@@ -0,0 +1,114 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from nose.tools import eq_, ok_
+from rest_framework.test import APITestCase
+
+from config.cache import TwoTierCache
+from ..cache import response_generation, response_key, user_response_cache
+from ..forms import CustomUserChangeForm
+from .factories import UserFactory
+
+
+class TestGetOrCompute(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cache = TwoTierCache(prefix='test')
+        self.calls = []
+
+    def compute(self):
+        self.calls.append(1)
+        return 'value'
+
+    def test_value_is_computed_once(self):
+        eq_(self.cache.get_or_compute('key', self.compute), 'value')
+        eq_(self.cache.get_or_compute('key', self.compute), 'value')
+        eq_(len(self.calls), 1)
+
+    def test_waits_for_lock_holder(self):
+        cache.add(self.cache.make_key('lock:key'), 1)
+        cache.set(self.cache.make_key('key'), 'theirs')
+        eq_(self.cache.get_or_compute('key', self.compute, wait=0.1), 'theirs')
+        eq_(self.calls, [])
+
+    def test_computes_when_lock_holder_is_slow(self):
+        cache.add(self.cache.make_key('lock:key'), 1)
+        eq_(self.cache.get_or_compute('key', self.compute, wait=0.01), 'value')
+        eq_(len(self.calls), 1)
+
+    def test_none_is_not_stored(self):
+        self.cache.get_or_compute('key', lambda: None)
+        eq_(self.cache.get('key'), None)
+
+
+class TestUserResponseCache(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_response_cache.clear_local()
+        self.user = UserFactory()
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        self.client.force_authenticate(self.user)
+
+    def get(self, url=None):
+        response = self.client.get(url or self.url)
+        eq_(response.status_code, 200)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_cached_response_skips_database(self):
+        first = self.get()
+        with self.assertNumQueries(0):
+            eq_(self.get(), first)
+
+    def test_key_ignores_uuid_spelling(self):
+        self.get()
+        with self.assertNumQueries(0):
+            self.get(reverse('user-detail', kwargs={'pk': str(self.user.pk).upper()}))
+
+    def test_update_invalidates(self):
+        self.get()
+        self.client.patch(self.url, {'first_name': 'Changed'})
+        eq_(self.get()['first_name'], 'Changed')
+
+    def test_admin_edit_invalidates(self):
+        self.get()
+        data = {'username': self.user.username, 'first_name': 'Admin', 'last_name': '',
+                'email': '', 'is_active': True, 'date_joined': '2016-01-01 00:00',
+                'password': self.user.password}
+        form = CustomUserChangeForm(data, instance=self.user)
+        ok_(form.is_valid(), form.errors)
+        form.save()
+        eq_(self.get()['first_name'], 'Admin')
+
+    def test_field_selections_are_cached_apart(self):
+        eq_(self.get(self.url + '?fields=id,username'), {'id': str(self.user.pk), 'username': self.user.username})
+        eq_(set(self.get()), {'id', 'username', 'first_name', 'last_name'})
+
+        self.client.patch(self.url, {'first_name': 'Changed'})
+        eq_(self.get(self.url + '?exclude=id,username'), {'first_name': 'Changed', 'last_name': self.user.last_name})
+
+    def test_update_invalidates_field_selections(self):
+        self.get(self.url + '?fields=first_name')
+        self.client.patch(self.url, {'first_name': 'Changed'})
+        eq_(self.get(self.url + '?fields=first_name'), {'first_name': 'Changed'})
+
+    def test_save_moves_to_a_new_generation(self):
+        generation = response_generation(self.user.pk)
+        self.get(self.url + '?fields=first_name')
+        self.user.save()
+
+        ok_(response_generation(self.user.pk) > generation)
+        eq_(user_response_cache.get(response_key(self.user.pk, 'json', ('first_name',))), None)
+
+    def test_browsable_api_is_not_cached(self):
+        self.client.get(self.url, HTTP_ACCEPT='text/html')
+        eq_(user_response_cache.get(response_key(self.user.pk, 'api')), None)
+
+    @override_settings(USERS_RESPONSE_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        self.get()
+        with self.assertNumQueries(2):
+            self.get()
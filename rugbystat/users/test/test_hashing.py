@@ -0,0 +1,80 @@
+import threading
+
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from mock import patch
+from nose.tools import eq_, ok_
+from rest_framework.test import APITestCase
+
+from ..hashing import HashingBusy, HashingService
+from .factories import UserFactory
+
+
+class TestHashingService(TestCase):
+
+    def test_runs_function(self):
+        service = HashingService(workers=1, max_waiting=0, queue_timeout=1)
+        eq_(service.run(pow, 2, 3), 8)
+        eq_(service.in_flight, 0)
+
+    def test_map_keeps_order_within_capacity(self):
+        service = HashingService(workers=2, max_waiting=0, queue_timeout=1)
+        eq_(service.map(abs, [-1, -2, -3, -4, -5]), [1, 2, 3, 4, 5])
+        eq_(service.in_flight, 0)
+
+    def test_rejects_when_saturated(self):
+        service = HashingService(workers=1, max_waiting=0, queue_timeout=1)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        thread = threading.Thread(target=service.run, args=(block,))
+        thread.start()
+        started.wait()
+        try:
+            with self.assertRaises(HashingBusy):
+                service.run(pow, 2, 3)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_rejects_hash_that_waited_too_long(self):
+        service = HashingService(workers=1, max_waiting=1, queue_timeout=0)
+        with self.assertRaises(HashingBusy):
+            service.run(pow, 2, 3)
+
+
+class TestPasswordUpgrade(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.user.password = make_password('secret-password', hasher='pbkdf2_sha256')
+        self.user.save()
+
+    def test_login_rehashes_with_argon2(self):
+        ok_(self.user.check_password('secret-password'))
+        self.user.refresh_from_db()
+        ok_(self.user.password.startswith('argon2$'))
+        ok_(self.user.check_password('secret-password'))
+
+    def test_wrong_password_keeps_hash(self):
+        ok_(not self.user.check_password('wrong-password'))
+        self.user.refresh_from_db()
+        ok_(self.user.password.startswith('pbkdf2_sha256$'))
+
+
+@override_settings(THROTTLE_RATES={})
+class TestTokenAuthThrottling(APITestCase):
+
+    def test_busy_hashing_returns_429(self):
+        user = UserFactory()
+        user.set_password('secret-password')
+        user.save()
+        with patch.object(HashingService, 'run', side_effect=HashingBusy(wait=2)):
+            response = self.client.post(reverse('api-token-auth'), {
+                'username': user.username, 'password': 'whatever'})
+        eq_(response.status_code, 429)
+        eq_(response['Retry-After'], '2')
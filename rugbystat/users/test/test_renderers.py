@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import uuid
+
+from django.test import SimpleTestCase
+from nose.tools import eq_
+from rest_framework.renderers import JSONRenderer
+
+from ..renderers import FastJSONRenderer
+
+
+class TestFastJSONRenderer(SimpleTestCase):
+
+    def test_output_matches_json_renderer(self):
+        data = {'username': 'Дмитрий', 'results': [1, 2.5, None, True], 'url': 'a/b '}
+        fast = FastJSONRenderer().render(data)
+
+        eq_(json.loads(fast.decode('utf-8')), json.loads(JSONRenderer().render(data).decode('utf-8')))
+        eq_(b'\xe2\x80\xa8' in fast, False)
+
+    def test_unsupported_values_fall_back(self):
+        data = {'id': uuid.uuid4()}
+        eq_(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_empty_body(self):
+        eq_(FastJSONRenderer().render(None), b'')
@@ -3,7 +3,8 @@ from django.forms.models import model_to_dict
 from django.contrib.auth.hashers import check_password
 from nose.tools import eq_, ok_
 from .factories import UserFactory
-from ..serializers import CreateUserSerializer
+from ..models import User
+from ..serializers import CreateUserSerializer, UserSerializer, fast_user_serializer
 
 
 class TestCreateUserSerializer(TestCase):
@@ -25,3 +26,11 @@ class TestCreateUserSerializer(TestCase):
 
         user = serializer.save()
         ok_(check_password(self.user_data.get('password'), user.password))
+
+
+class TestFastUserSerializer(TestCase):
+
+    def test_output_matches_user_serializer(self):
+        user = UserFactory()
+        row = User.objects.values(*fast_user_serializer.fields).get(pk=user.pk)
+        eq_(fast_user_serializer.to_representation(row), dict(UserSerializer(user).data))
@@ -1,15 +1,24 @@
+import json
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.forms.models import model_to_dict
 from django.contrib.auth.hashers import check_password
 from nose.tools import ok_, eq_
 from rest_framework.test import APITestCase
 from faker import Faker
+from mock import patch
+from ..cache import user_response_cache
 from ..models import User
+from ..serializers import UserSerializer
 from .factories import UserFactory
 
 fake = Faker()
 
 
+@override_settings(THROTTLE_RATES={})
 class TestUserAPI(APITestCase):
     """
     Tests the /users endpoint.
@@ -51,3 +60,244 @@ class TestUserDetailAPI(APITestCase):
 
         user = User.objects.get(pk=self.user.id)
         eq_(user.first_name, new_first_name)
+
+
+class TestUserBulkAPI(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('user-bulk')
+        self.admin = UserFactory(is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def build_rows(self, count):
+        return [{'username': user.username, 'password': user.password, 'email': user.email}
+                for user in UserFactory.build_batch(count)]
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(UserFactory())
+        response = self.client.post(self.url, self.build_rows(1), format='json')
+        eq_(response.status_code, 403)
+
+    def test_creates_users_and_tokens(self):
+        rows = self.build_rows(3)
+        response = self.client.post(self.url, rows, format='json')
+        eq_(response.status_code, 201)
+        eq_(len(response.data['created']), 3)
+        eq_(response.data['errors'], [])
+
+        user = User.objects.get(username=rows[0]['username'])
+        ok_(check_password(rows[0]['password'], user.password))
+        eq_(user.auth_token.key, response.data['created'][0]['auth_token'])
+
+    def test_reports_errors_per_row(self):
+        rows = self.build_rows(2)
+        rows.insert(1, {'username': self.admin.username, 'password': fake.password()})
+        rows.append({'password': fake.password()})
+        rows.append(dict(rows[0]))
+
+        response = self.client.post(self.url, rows, format='json')
+        eq_(response.status_code, 201)
+        eq_(len(response.data['created']), 2)
+        eq_([error['row'] for error in response.data['errors']], [1, 3, 4])
+
+    def test_other_integrity_errors_are_raised(self):
+        # the second token collides with the first, not with a username
+        with patch('users.bulk.Token.generate_key', return_value='0' * 40):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, self.build_rows(2), format='json')
+
+
+class TestUserListAPI(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('user-list')
+        self.users = UserFactory.create_batch(3)
+        self.client.force_authenticate(self.users[0])
+
+    def test_anonymous_list_is_refused(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url)
+        eq_(response.status_code, 403)
+
+    def test_list_walks_pages_by_cursor(self):
+        seen = []
+        response = self.client.get(self.url, {'page_size': 2})
+        eq_(response.status_code, 200)
+        seen.extend(user['id'] for user in response.data['results'])
+
+        response = self.client.get(response.data['next'])
+        seen.extend(user['id'] for user in response.data['results'])
+        eq_(response.data['next'], None)
+        eq_(sorted(seen), sorted(str(user.pk) for user in self.users))
+
+
+class TestUserSparseFieldsAPI(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_response_cache.clear_local()
+        self.user = UserFactory()
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        response.json = json.loads(response.content.decode('utf-8'))
+        return response, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_fields_narrow_response_and_columns(self):
+        response, sql = self.get(self.url, fields='username')
+        eq_(response.status_code, 200)
+        eq_(response.json, {'username': self.user.username})
+        ok_('"first_name"' not in sql)
+        ok_('"password"' not in sql)
+
+    def test_exclude(self):
+        response, sql = self.get(self.url, exclude='first_name, last_name')
+        eq_(response.json, {'id': str(self.user.pk), 'username': self.user.username})
+
+    def test_full_reads_skip_unused_columns(self):
+        response, sql = self.get(self.url)
+        eq_(set(response.json), set(UserSerializer.Meta.fields))
+        ok_('"password"' not in sql)
+
+    def test_unknown_fields_are_rejected(self):
+        response, sql = self.get(self.url, fields='username,password')
+        eq_(response.status_code, 400)
+        ok_('password' in response.json['fields'][0])
+
+    def test_nothing_left_is_rejected(self):
+        response, sql = self.get(self.url, exclude=','.join(UserSerializer.Meta.fields))
+        eq_(response.status_code, 400)
+
+    def test_list(self):
+        response, sql = self.get(reverse('user-list'), fields='username', page_size=1)
+        eq_(response.json['results'], [{'username': self.user.username}])
+        ok_('"password"' not in sql)
+
+    @override_settings(USERS_FAST_RENDERING=True)
+    def test_fast_rendering(self):
+        UserFactory()
+        response, sql = self.get(self.url, fields='id,last_name')
+        eq_(response.json, {'id': str(self.user.pk), 'last_name': self.user.last_name})
+
+        response, sql = self.get(reverse('user-list'), fields='username', page_size=1)
+        eq_(len(response.json['results']), 1)
+        eq_(set(response.json['results'][0]), {'username'})
+        ok_(response.json['next'])
+
+
+class TestUserExportAPI(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('user-export')
+        self.admin = UserFactory(is_staff=True)
+        UserFactory.create_batch(2)
+        self.client.force_authenticate(self.admin)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url)
+        eq_(response.status_code, 200)
+        lines = self.read(response)
+        eq_(len(lines), 3)
+        ok_(json.loads(lines[0])['username'])
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'output': 'csv'})
+        eq_(response.status_code, 200)
+        lines = self.read(response)
+        eq_(lines[0], 'id,username,first_name,last_name')
+        eq_(len(lines), 4)
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get(self.url, {'output': 'xml'})
+        eq_(response.status_code, 400)
+
+
+class TestUserDetailConditionalAPI(APITestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        self.client.force_authenticate(self.user)
+
+    def test_get_request_sets_validators(self):
+        response = self.client.get(self.url)
+        eq_(response.status_code, 200)
+        ok_(response['ETag'])
+        ok_(response['Last-Modified'])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 304)
+        eq_(response['ETag'], etag)
+
+    def test_unmodified_since_returns_not_modified(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        eq_(response.status_code, 304)
+
+    def test_update_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.put(self.url, {'first_name': fake.first_name()})
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 200)
+        ok_(response['ETag'] != etag)
+
+    def test_etag_depends_on_fields_and_format(self):
+        etags = set(self.client.get(self.url, params, **headers)['ETag'] for params, headers in (
+            ({}, {}),
+            ({'fields': 'username'}, {}),
+            ({'exclude': 'first_name,last_name'}, {}),
+            ({'exclude': 'last_name,first_name'}, {}),
+            ({}, {'HTTP_ACCEPT': 'text/html'}),
+        ))
+        eq_(len(etags), 4)
+
+    @override_settings(USERS_RESPONSE_CACHE_TIMEOUT=60)
+    def test_cached_responses_vary_on_accept(self):
+        user_response_cache.clear_local()
+        for i in range(2):
+            response = self.client.get(self.url)
+            ok_('Accept' in response['Vary'])
+        etag = response['ETag']
+        ok_('Accept' in self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)['Vary'])
+
+    def test_concurrent_saves_get_different_versions(self):
+        first, second = User.objects.get(pk=self.user.pk), User.objects.get(pk=self.user.pk)
+        first.first_name = 'Igor'
+        first.save()
+        second.first_name = 'Oleg'
+        second.save()
+
+        eq_((first.version, second.version), (self.user.version + 1, self.user.version + 2))
+        eq_(User.objects.get(pk=self.user.pk).version, second.version)
+
+    def test_unknown_user_is_not_found(self):
+        response = self.client.get(reverse('user-detail', kwargs={'pk': 'missing'}))
+        eq_(response.status_code, 404)
+
+
+@override_settings(USERS_FAST_RENDERING=True)
+class TestUserFastRenderingAPI(APITestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve(self):
+        response = self.client.get(reverse('user-detail', kwargs={'pk': self.user.pk}))
+        eq_(response.status_code, 200)
+        eq_(json.loads(response.content.decode('utf-8')), dict(UserSerializer(self.user).data))
+
+    def test_list(self):
+        response = self.client.get(reverse('user-list'))
+        eq_(response.status_code, 200)
+        eq_(response.data['results'], [dict(UserSerializer(self.user).data)])
@@ -1,23 +1,230 @@
-from rest_framework import viewsets, mixins
-from rest_framework.permissions import AllowAny
+import calendar
 
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status, viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from authentication.throttling import SignupRateThrottle
+from config.db.routers import use_primary
+
+from .cache import CACHED_FORMATS, response_key, user_response_cache
+from .export import EXPORT_FORMATS, stream_users
 from .models import User
+from .pagination import UserCursorPagination
 from .permissions import IsUserOrReadOnly
-from .serializers import CreateUserSerializer, UserSerializer
+from .renderers import FastJSONRenderer
+from .serializers import BulkCreateUserSerializer, CreateUserSerializer, UserSerializer, fast_user_serializer
+
+
+# actions that answer ?fields= and ?exclude=
+SPARSE_ACTIONS = ('retrieve', 'list')
 
 
 class UserViewSet(mixins.CreateModelMixin,
                   mixins.RetrieveModelMixin,
                   mixins.UpdateModelMixin,
+                  mixins.ListModelMixin,
                   viewsets.GenericViewSet):
     """
-    Creates, Updates, and retrives User accounts
+    Creates, Updates, lists and retrives User accounts
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsUserOrReadOnly,)
+    pagination_class = UserCursorPagination
+
+    def get_permissions(self):
+        if self.action == 'list':
+            return [IsAuthenticated()]
+        return super(UserViewSet, self).get_permissions()
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [SignupRateThrottle()]
+        return super(UserViewSet, self).get_throttles()
+
+    def get_queryset(self):
+        queryset = super(UserViewSet, self).get_queryset()
+        if self.action in SPARSE_ACTIONS:
+            # keeps the password hash and timestamps out of reads
+            queryset = queryset.only(*self.get_selected_fields() or UserSerializer.Meta.fields)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super(UserViewSet, self).get_serializer_context()
+        context['fields'] = self.get_selected_fields()
+        return context
+
+    def get_selected_fields(self):
+        """
+        Returns the serializer fields picked with ``?fields=`` or dropped
+        with ``?exclude=`` (comma separated), in serializer order, or
+        ``None`` when the whole user is asked for.
+        """
+        if self.action not in SPARSE_ACTIONS:
+            return None
+        if not hasattr(self, '_selected_fields'):
+            self._selected_fields = self.parse_selected_fields()
+        return self._selected_fields
+
+    def parse_selected_fields(self):
+        available = UserSerializer.Meta.fields
+        selected = available
+        for param in ('fields', 'exclude'):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            names = set(name.strip() for name in value.split(',') if name.strip())
+            unknown = names.difference(available)
+            if unknown:
+                raise ValidationError({param: ['Unknown fields: {}. Choose from: {}.'.format(
+                    ', '.join(sorted(unknown)), ', '.join(available))]})
+            if param == 'fields':
+                selected = tuple(name for name in selected if name in names)
+            else:
+                selected = tuple(name for name in selected if name not in names)
+        if not selected:
+            raise ValidationError({'fields': ['No fields left to return.']})
+        return None if selected == available else selected
+
+    def get_renderers(self):
+        renderers = super(UserViewSet, self).get_renderers()
+        if settings.USERS_FAST_RENDERING:
+            renderers = [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+                         for renderer in renderers]
+        return renderers
+
+    def get_lookup(self):
+        return {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+
+    def get_version_stamp(self):
+        """
+        Returns ``(etag, last_modified)`` of the requested user without
+        loading the row, or ``None`` if there is no such user.
+        """
+        try:
+            stamp = User.objects.filter(**self.get_lookup()).values_list('pk', 'version', 'modified').first()
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+        if stamp is None:
+            return None
+        pk, version, modified = stamp
+        return self.get_etag(pk, version), calendar.timegm(modified.utctimetuple())
+
+    def get_etag(self, pk, version):
+        """
+        A strong ETag is per representation, so the rendered format and the
+        selected fields go into it besides the user's version.
+        """
+        parts = [pk, version, self.request.accepted_renderer.format]
+        fields = self.get_selected_fields()
+        if fields is not None:
+            # If-None-Match lists are split on commas
+            parts.append('+'.join(fields))
+        return quote_etag('-'.join(str(part) for part in parts))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serves rendered users from the response cache, invalidated by
+        ``users.cache`` whenever a user is saved or deleted.
+        """
+        key = None
+        if request.accepted_renderer.format in CACHED_FORMATS and settings.USERS_RESPONSE_CACHE_TIMEOUT:
+            key = response_key(self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+                               request.accepted_renderer.format, self.get_selected_fields())
+        if key is None:
+            return self.retrieve_fresh(request, *args, **kwargs)
+
+        entry = user_response_cache.get_or_compute(key, lambda: self.render_entry(request, *args, **kwargs))
+        if entry is None:
+            return self.retrieve_fresh(request, *args, **kwargs)
+
+        etag, last_modified, content_type, content = entry
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        return self.set_validators(response, etag, last_modified)
+
+    def render_entry(self, request, *args, **kwargs):
+        # a lagging replica could put a stale user back right after the
+        # invalidation, and it would be served until the entry expires
+        with use_primary():
+            stamp = self.get_version_stamp()
+            if stamp is None:
+                return None
+            response = self.finalize_response(request, self.get_detail_response(request, *args, **kwargs))
+        response.render()
+        return stamp + (response['Content-Type'], response.rendered_content)
+
+    def retrieve_fresh(self, request, *args, **kwargs):
+        stamp = self.get_version_stamp()
+        if stamp is None:
+            return super(UserViewSet, self).retrieve(request, *args, **kwargs)
+
+        etag, last_modified = stamp
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.get_detail_response(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def get_detail_response(self, request, *args, **kwargs):
+        if settings.USERS_FAST_RENDERING:
+            # IsUserOrReadOnly allows every read, so the object check is skipped
+            serializer = fast_user_serializer.select(self.get_selected_fields())
+            row = self.get_queryset().values(*serializer.fields).get(**self.get_lookup())
+            return Response(serializer.to_representation(row))
+        return super(UserViewSet, self).retrieve(request, *args, **kwargs)
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # finalize_response only adds it once per request, and render_entry
+        # may already have used it up
+        patch_vary_headers(response, ('Accept',))
+        return response
 
     def create(self, request, *args, **kwargs):
         self.serializer_class = CreateUserSerializer
         self.permission_classes = (AllowAny,)
         return super(UserViewSet, self).create(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.USERS_FAST_RENDERING:
+            return super(UserViewSet, self).list(request, *args, **kwargs)
+
+        serializer = fast_user_serializer.select(self.get_selected_fields())
+        # the cursor is made from the id of the last row, wanted or not
+        columns = set(serializer.fields) | {self.paginator.ordering}
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(serializer.many(page))
+
+    @action(detail=False, methods=['post'], permission_classes=(IsAdminUser,))
+    def bulk(self, request):
+        """
+        Creates a list of users at once, reporting validation errors per row.
+        """
+        serializer = BulkCreateUserSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        errors = [{'row': index, 'errors': detail} for index, detail in serializer.row_errors]
+        code = status.HTTP_201_CREATED if serializer.instance else status.HTTP_400_BAD_REQUEST
+        return Response({'created': serializer.data, 'errors': errors}, status=code)
+
+    @action(detail=False, methods=['get'], permission_classes=(IsAdminUser,))
+    def export(self, request):
+        """
+        Streams every user as NDJSON (default) or CSV, chosen by ``?output=``.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': ['Choose one of: {}.'.format(', '.join(sorted(EXPORT_FORMATS)))]})
+        return stream_users(UserSerializer.Meta.fields, output)
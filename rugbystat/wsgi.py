@@ -15,4 +15,8 @@ from configurations.wsgi import get_wsgi_application  # noqa
 from whitenoise.django import DjangoWhiteNoise        # noqa
 
 application = get_wsgi_application()
+
+from config.warmup import warm_up                     # noqa
+warm_up()
+
 application = DjangoWhiteNoise(application)